@@ -4,7 +4,15 @@ localseek - Local-first full-text search engine
 
 __version__ = "0.1.0"
 
-from .index import Indexer
-from .search import Searcher
-
 __all__ = ["Indexer", "Searcher"]
+
+
+def __getattr__(name):
+    # Import lazily so `python -m localseek --help` doesn't load the core
+    if name == "Indexer":
+        from .index import Indexer
+        return Indexer
+    if name == "Searcher":
+        from .search import Searcher
+        return Searcher
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
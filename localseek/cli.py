@@ -12,87 +12,168 @@ Usage:
 """
 
 import argparse
-import json
+import atexit
+import importlib
 import sys
 from pathlib import Path
-from typing import Optional, List
+from typing import TYPE_CHECKING, Any, Dict, Optional, List, Tuple
 
-from .index import Indexer
-from .search import Searcher
-from .metrics import get_metrics_db, SearchMetrics
+from . import jsonio
+
+# Core modules are imported by the commands that need them, so that
+# `--help` and argument errors don't pay for them
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from .index import Indexer
+    from .search import Searcher
+
+
+# Lazily created, process-wide instances (closed at exit)
+_indexer: Optional["Indexer"] = None
+_searcher: Optional["Searcher"] = None
+_parser: Optional[argparse.ArgumentParser] = None
+
+# Resolved optional-module attributes, None when the module is unavailable
+_optional_cache: Dict[Tuple[str, str], Any] = {}
+
+
+def _get_indexer() -> "Indexer":
+    """Get or create the shared Indexer instance"""
+    global _indexer
+    if _indexer is None:
+        from .index import Indexer
+        _indexer = Indexer()
+        atexit.register(_indexer.close)
+    return _indexer
+
+
+def _get_searcher() -> "Searcher":
+    """Get or create the shared Searcher instance"""
+    global _searcher
+    if _searcher is None:
+        from .search import Searcher
+        _searcher = Searcher()
+        atexit.register(_searcher.close)
+    return _searcher
+
+
+def _optional(module: str, name: str) -> Any:
+    """Import localseek.optional.<module>.<name> once; None if unavailable"""
+    key = (module, name)
+    if key not in _optional_cache:
+        try:
+            mod = importlib.import_module(f".optional.{module}", __package__)
+            _optional_cache[key] = getattr(mod, name)
+        except (ImportError, AttributeError):
+            _optional_cache[key] = None
+    return _optional_cache[key]
 
 
 def cmd_add(args):
     """Add a collection"""
-    indexer = Indexer()
-    try:
-        path = Path(args.path).resolve()
-        if not path.exists():
-            print(f"Error: Path does not exist: {path}", file=sys.stderr)
-            return 1
-        
-        name = args.name or path.name
-        glob_pattern = args.glob or "**/*.md"
-        
-        print(f"Indexing {path} as '{name}'...")
-        count = indexer.add_collection(str(path), name, glob_pattern)
-        print(f"Indexed {count} documents")
-        return 0
-    finally:
-        indexer.close()
+    indexer = _get_indexer()
+    if args.workers:
+        indexer.workers = args.workers
+    path = Path(args.path).resolve()
+    if not path.exists():
+        print(f"Error: Path does not exist: {path}", file=sys.stderr)
+        return 1
+    
+    name = args.name or path.name
+    glob_pattern = args.glob or "**/*.md"
+    
+    print(f"Indexing {path} as '{name}'...")
+    count = indexer.add_collection(str(path), name, glob_pattern)
+    print(f"Indexed {count} documents")
+    return 0
 
 
 def cmd_search(args):
     """Search documents with optional LLM enhancement"""
-    searcher = Searcher()
-    metrics_db = get_metrics_db()
+    from .config import get_config
+    from .metrics import get_metrics_recorder, SearchMetrics
+    
+    searcher = _get_searcher()
+    recorder = get_metrics_recorder()
     metrics = SearchMetrics.start(args.query, args.collection)
     
     try:
         # Track enhancement options
         use_expand = getattr(args, 'expand', False)
         use_rerank = getattr(args, 'rerank', False)
+        use_fetch = getattr(args, 'fetch', False)
         cache_hit_expansion = False
         cache_hit_rerank = 0
         
-        # Get base results (possibly with expansion)
+        # Web search only needs the original query, so start it now and
+        # let it overlap with expansion, local search and rerank
+        web_future = _start_web_fetch(args) if use_fetch else None
+        
+        # Start expansion in the background; the original query is
+        # searched while the LLM works
         queries = [args.query]
+        expand_future = None
         
         if use_expand:
-            try:
-                from .optional.expand import expand_query, ExpansionCache
-                cache = ExpansionCache() if args.cache else None
-                queries, cache_hit_expansion = expand_query(
+            expand_query_async = _optional("expand", "expand_query_async")
+            if expand_query_async is None:
+                print("Warning: Expansion module not available", file=sys.stderr)
+            else:
+                ExpansionCache = _optional("expand", "ExpansionCache")
+                expansion_cache = ExpansionCache() if args.cache else None
+                expand_future = expand_query_async(
                     args.query, 
                     count=args.expand_count,
-                    cache=cache
+                    cache=expansion_cache
                 )
-                if len(queries) > 1:
-                    print(f"Expanded to {len(queries)} queries: {queries}", file=sys.stderr)
-            except ImportError:
-                print("Warning: Expansion module not available", file=sys.stderr)
         
-        # Search with all queries and merge (RRF)
-        all_results = []
-        for q in queries:
-            results = searcher.search(
-                query=q,
-                collection=args.collection,
-                limit=args.limit * 2 if use_rerank else args.limit,
-                min_score=args.min_score
-            )
-            all_results.extend(results)
+        # Fetch extra candidates when the reranker gets to reorder them
+        fetch_limit = args.limit * 2 if use_rerank else args.limit
+        
+        # One ranked list per query, starting with the original
+        per_query_results = [searcher.search(
+            args.query,
+            collection=args.collection,
+            limit=fetch_limit,
+            min_score=args.min_score
+        )]
+        
+        if expand_future is not None:
+            from concurrent.futures import TimeoutError as FutureTimeoutError
+            
+            try:
+                queries, cache_hit_expansion = expand_future.result(
+                    timeout=get_config().expand_timeout
+                )
+                if expansion_cache:
+                    expansion_cache.close()
+            except FutureTimeoutError:
+                print("Warning: Query expansion timed out, using the original query only",
+                      file=sys.stderr)
+            
+            if len(queries) > 1:
+                print(f"Expanded to {len(queries)} queries: {queries}", file=sys.stderr)
+                # Search the expansions (concurrently)
+                per_query_results += searcher.search_many(
+                    queries[1:],
+                    collection=args.collection,
+                    limit=fetch_limit,
+                    min_score=args.min_score
+                )
         
         # Dedupe and RRF merge if multiple queries
         if len(queries) > 1:
-            results = _rrf_merge(all_results, queries, args.limit * 2 if use_rerank else args.limit)
+            results = _rrf_merge(per_query_results, fetch_limit)
         else:
-            results = all_results[:args.limit * 2 if use_rerank else args.limit]
+            results = per_query_results[0][:fetch_limit]
         
-        # Rerank if requested
-        if use_rerank and results:
-            try:
-                from .optional.rerank import rerank_results, RerankCache
+        # Rerank if requested (a single candidate has nothing to reorder)
+        if use_rerank and len(results) > 1:
+            rerank_results = _optional("rerank", "rerank_results")
+            if rerank_results is None:
+                print("Warning: Rerank module not available", file=sys.stderr)
+            else:
+                RerankCache = _optional("rerank", "RerankCache")
                 cache = RerankCache() if args.cache else None
                 
                 # Convert to dicts for reranker
@@ -103,28 +184,26 @@ def cmd_search(args):
                     topk=args.rerank_topk,
                     cache=cache
                 )
+                if cache:
+                    cache.close()
                 
                 # Use reranked results
                 if reranked:
                     results = reranked[:args.limit]
-                    
-            except ImportError:
-                print("Warning: Rerank module not available", file=sys.stderr)
         else:
             results = results[:args.limit]
         
-        # Fetch web results if requested
-        use_fetch = getattr(args, 'fetch', False)
+        # Text output: show local results now, before the slower web/LLM steps
+        if not args.json and results:
+            _print_local_results(results)
+        
+        # Collect web results if requested
         web_results = []
-        if use_fetch:
+        if web_future is not None:
             try:
-                from .optional.web_search import fetch_web_results
-                fetch_count = getattr(args, 'fetch_count', 3)
-                web_results = fetch_web_results(args.query, max_results=fetch_count)
+                web_results = web_future.result()
                 if web_results:
                     print(f"Fetched {len(web_results)} web results", file=sys.stderr)
-            except ImportError:
-                print("Warning: Web search module not available", file=sys.stderr)
             except Exception as e:
                 print(f"Warning: Web search failed: {e}", file=sys.stderr)
         
@@ -136,15 +215,23 @@ def cmd_search(args):
             cache_hit_expansion=cache_hit_expansion,
             cache_hit_rerank=cache_hit_rerank,
         )
-        metrics_db.record(metrics)
+        recorder.enqueue(metrics)
+        
+        if not args.json:
+            if not results and not web_results:
+                print("No results found.")
+                return 0
+            if web_results:
+                _print_web_results(web_results)
         
         # Prepare summary if requested
         use_summarize = getattr(args, 'summarize', False)
         summary = None
         if use_summarize:
-            try:
-                from .optional.summarize import summarize_with_context
-                
+            summarize_with_context = _optional("summarize", "summarize_with_context")
+            if summarize_with_context is None:
+                print("Warning: Summarize module not available", file=sys.stderr)
+            else:
                 # Convert results to dicts for summarizer
                 result_dicts = []
                 for r in results:
@@ -166,9 +253,6 @@ def cmd_search(args):
                     expanded_queries=queries if use_expand and len(queries) > 1 else None,
                     web_results=web_results if web_results else None,
                 )
-                    
-            except ImportError:
-                print("Warning: Summarize module not available", file=sys.stderr)
         
         # Output
         if args.json:
@@ -197,260 +281,277 @@ def cmd_search(args):
                     "expanded_queries": queries if use_expand else None,
                     "count": len(results),
                     "summary": summary,
-                    "results": [r.to_dict() if hasattr(r, 'to_dict') else r for r in results],
+                    "results": results,
                     "web_results": web_results if web_results else None,
                 }
-            print(json.dumps(output, indent=2))
+            # Stream straight to stdout; compact when piped to another tool
+            jsonio.dump(output, indent=sys.stdout.isatty())
         else:
-            if not results and not web_results:
-                print("No results found.")
-                return 0
-            
-            # Local results
-            if results:
-                print("\n=== Local Documents ===")
-                for i, r in enumerate(results, 1):
-                    if hasattr(r, 'blended_score'):  # Reranked result
-                        print(f"\n{r.collection}/{r.path}")
-                        print(f"  Title: {r.title}")
-                        print(f"  Score: {r.blended_score:.3f} (BM25: {r.original_score:.2f}, Rerank: {r.rerank_score:.1f})")
-                        print(f"  {r.snippet}")
-                    else:
-                        print(f"\n{r.collection}/{r.path}")
-                        print(f"  Title: {r.title}")
-                        print(f"  Score: {r.score:.3f}")
-                        print(f"  {r.snippet}")
-            
-            # Web results
-            if web_results:
-                print("\n=== Web Results ===")
-                for i, r in enumerate(web_results, 1):
-                    print(f"\n[{i}] {r.get('title', 'Untitled')}")
-                    print(f"    {r.get('url', '')}")
-                    if r.get('snippet'):
-                        print(f"    {r.get('snippet', '')[:150]}...")
-            
-            # Print summary at the end for text output
-            if summary:
-                print("\n" + "=" * 60)
-                print("SUMMARY")
-                print("=" * 60)
-                print(summary)
-            elif use_summarize:
-                print("\n(LLM not available for summarization)")
+            _print_summary(summary, use_summarize)
         
         return 0
     except Exception as e:
         metrics.error = str(e)
-        metrics_db.record(metrics)
+        recorder.enqueue(metrics)
         raise
-    finally:
-        searcher.close()
 
 
-def _rrf_merge(results: List, queries: List[str], limit: int) -> List:
-    """Merge results from multiple queries using Reciprocal Rank Fusion"""
+def _start_web_fetch(args) -> Optional["Future"]:
+    """Run the web search in a background thread; None if unavailable"""
+    fetch_web_results_async = _optional("web_search", "fetch_web_results_async")
+    if fetch_web_results_async is None:
+        print("Warning: Web search module not available", file=sys.stderr)
+        return None
+    
+    fetch_count = getattr(args, 'fetch_count', 3)
+    return fetch_web_results_async(args.query, max_results=fetch_count)
+
+
+def _print_local_results(results: List):
+    """Print local results (plain or reranked) and flush"""
+    lines = ["\n=== Local Documents ==="]
+    for r in results:
+        lines.append(f"\n{r.collection}/{r.path}")
+        lines.append(f"  Title: {r.title}")
+        if hasattr(r, 'blended_score'):  # Reranked result
+            lines.append(f"  Score: {r.blended_score:.3f} (BM25: {r.original_score:.2f}, Rerank: {r.rerank_score:.1f})")
+        else:
+            lines.append(f"  Score: {r.score:.3f}")
+        lines.append(f"  {r.snippet}")
+    print("\n".join(lines), flush=True)
+
+
+def _print_web_results(web_results: List[dict]):
+    """Print web results and flush"""
+    lines = ["\n=== Web Results ==="]
+    for i, r in enumerate(web_results, 1):
+        lines.append(f"\n[{i}] {r.get('title', 'Untitled')}")
+        lines.append(f"    {r.get('url', '')}")
+        if r.get('snippet'):
+            lines.append(f"    {r.get('snippet', '')[:150]}...")
+    print("\n".join(lines), flush=True)
+
+
+def _print_summary(summary: Optional[str], requested: bool):
+    """Print the LLM summary (or why there isn't one)"""
+    if summary:
+        print("\n" + "=" * 60)
+        print("SUMMARY")
+        print("=" * 60)
+        print(summary)
+    elif requested:
+        print("\n(LLM not available for summarization)")
+
+
+def _rrf_merge(per_query_results: List[List], limit: int, k: int = 60) -> List:
+    """
+    Merge ranked result lists using Reciprocal Rank Fusion
+    
+    Each list is the ranked output of one query; a document scores
+    1 / (k + rank) for every list it appears in.
+    """
     from collections import defaultdict
+    from heapq import nlargest
+    from operator import itemgetter
     
-    # RRF with k=60
-    k = 60
     scores = defaultdict(float)
     result_map = {}
     
-    # Group by query and assign ranks
-    for i, r in enumerate(results):
-        key = f"{r.collection}:{r.path}" if hasattr(r, 'collection') else r.get('path', str(i))
-        rank = (i % (len(results) // len(queries) + 1)) + 1  # Approximate rank
-        scores[key] += 1.0 / (k + rank)
-        if key not in result_map:
-            result_map[key] = r
+    for ranked in per_query_results:
+        for rank, r in enumerate(ranked, 1):
+            key = (r.collection, r.path)
+            scores[key] += 1.0 / (k + rank)
+            result_map.setdefault(key, r)
     
-    # Sort by RRF score
-    sorted_keys = sorted(scores.keys(), key=lambda x: scores[x], reverse=True)
+    # Top `limit` by RRF score (partial sort)
+    top = nlargest(limit, scores.items(), key=itemgetter(1))
     
-    return [result_map[k] for k in sorted_keys[:limit]]
+    return [result_map[key] for key, _ in top]
 
 
 def cmd_list(args):
     """List collections"""
-    indexer = Indexer()
-    try:
-        collections = indexer.list_collections()
-        
-        if args.json:
-            print(json.dumps(collections, indent=2))
-        else:
-            if not collections:
-                print("No collections. Use 'localseek add <path>' to add one.")
-                return 0
-            
-            print(f"{'Name':<20} {'Documents':<10} {'Path'}")
-            print("-" * 70)
-            for c in collections:
-                print(f"{c['name']:<20} {c['doc_count']:<10} {c['path']}")
+    indexer = _get_indexer()
+    collections = indexer.list_collections()
+    
+    if args.json:
+        jsonio.dump(collections)
+    else:
+        if not collections:
+            print("No collections. Use 'localseek add <path>' to add one.")
+            return 0
         
-        return 0
-    finally:
-        indexer.close()
+        lines = [f"{'Name':<20} {'Documents':<10} {'Path'}", "-" * 70]
+        lines.extend(f"{c['name']:<20} {c['doc_count']:<10} {c['path']}" for c in collections)
+        print("\n".join(lines))
+    
+    return 0
 
 
 def cmd_status(args):
     """Show index status"""
-    indexer = Indexer()
-    try:
-        stats = indexer.get_stats()
-        collections = indexer.list_collections()
+    indexer = _get_indexer()
+    stats = indexer.get_stats()
+    collections = indexer.list_collections()
+    
+    if args.json:
+        stats["collections_detail"] = collections
+        jsonio.dump(stats)
+    else:
+        lines = [
+            f"Database: {stats['db_path']}",
+            f"Size: {stats['db_size_mb']} MB",
+            f"Collections: {stats['collections']}",
+            f"Documents: {stats['documents']}",
+        ]
         
-        if args.json:
-            stats["collections_detail"] = collections
-            print(json.dumps(stats, indent=2))
-        else:
-            print(f"Database: {stats['db_path']}")
-            print(f"Size: {stats['db_size_mb']} MB")
-            print(f"Collections: {stats['collections']}")
-            print(f"Documents: {stats['documents']}")
-            
-            if collections:
-                print("\nCollections:")
-                for c in collections:
-                    print(f"  {c['name']}: {c['doc_count']} docs ({c['path']})")
+        if collections:
+            lines.append("\nCollections:")
+            lines.extend(f"  {c['name']}: {c['doc_count']} docs ({c['path']})" for c in collections)
         
-        return 0
-    finally:
-        indexer.close()
+        print("\n".join(lines))
+    
+    return 0
 
 
 def cmd_update(args):
     """Re-index all collections"""
-    indexer = Indexer()
-    try:
-        print("Updating all collections...")
-        results = indexer.update_all()
-        
-        for name, count in results.items():
-            print(f"  {name}: {count} documents updated")
-        
-        return 0
-    finally:
-        indexer.close()
+    indexer = _get_indexer()
+    if args.workers:
+        indexer.workers = args.workers
+    print("Updating all collections...")
+    results = indexer.update_all(bulk=args.bulk)
+    
+    for name, count in results.items():
+        print(f"  {name}: {count} documents updated")
+    
+    return 0
 
 
 def cmd_remove(args):
     """Remove a collection"""
-    indexer = Indexer()
-    try:
-        if indexer.remove_collection(args.name):
-            print(f"Removed collection: {args.name}")
-            return 0
-        else:
-            print(f"Collection not found: {args.name}", file=sys.stderr)
-            return 1
-    finally:
-        indexer.close()
+    indexer = _get_indexer()
+    if indexer.remove_collection(args.name):
+        print(f"Removed collection: {args.name}")
+        return 0
+    else:
+        print(f"Collection not found: {args.name}", file=sys.stderr)
+        return 1
+
+
+def cmd_vacuum(args):
+    """Optimize and compact the index database"""
+    indexer = _get_indexer()
+    before = indexer.get_stats()["db_size_mb"]
+    print("Optimizing index...")
+    indexer.vacuum_and_analyze()
+    after = indexer.get_stats()["db_size_mb"]
+    print(f"Done: {before} MB -> {after} MB")
+    return 0
 
 
 def cmd_get(args):
     """Get a document"""
-    searcher = Searcher()
-    try:
-        doc = searcher.get_document(args.path, args.collection)
-        
-        if not doc:
-            print(f"Document not found: {args.path}", file=sys.stderr)
-            return 1
+    searcher = _get_searcher()
+    doc = searcher.get_document(args.path, args.collection)
+    
+    if not doc:
+        print(f"Document not found: {args.path}", file=sys.stderr)
+        return 1
+    
+    if args.json:
+        jsonio.dump(doc)
+    else:
+        print(f"Title: {doc['title']}")
+        print(f"Path: {doc['path']}")
+        print(f"Collection: {doc['collection']}")
+        print("-" * 40)
         
-        if args.json:
-            print(json.dumps(doc, indent=2, default=str))
+        content = doc['content']
+        if args.full:
+            print(content)
         else:
-            print(f"Title: {doc['title']}")
-            print(f"Path: {doc['path']}")
-            print(f"Collection: {doc['collection']}")
-            print("-" * 40)
-            
-            content = doc['content']
-            if args.full:
-                print(content)
-            else:
-                # First 500 chars
-                print(content[:500] + "..." if len(content) > 500 else content)
-        
-        return 0
-    finally:
-        searcher.close()
+            # First 500 chars
+            print(content[:500] + "..." if len(content) > 500 else content)
+    
+    return 0
 
 
 def cmd_metrics(args):
     """Show metrics and optionally save a snapshot"""
+    from .metrics import get_metrics_db
+    
     metrics_db = get_metrics_db()
     
-    try:
-        # Save snapshot if requested
-        if args.snapshot:
-            snapshot_id = metrics_db.save_snapshot(args.snapshot)
-            print(f"Saved snapshot #{snapshot_id}: {args.snapshot}")
-        
-        # Get current stats
-        stats = metrics_db.get_stats()
-        low_score = metrics_db.get_low_score_queries(threshold=3.0, limit=5)
-        snapshots = metrics_db.get_snapshots(limit=5)
+    # Save snapshot if requested
+    if args.snapshot:
+        snapshot_id = metrics_db.save_snapshot(args.snapshot)
+        print(f"Saved snapshot #{snapshot_id}: {args.snapshot}")
+    
+    # Get current stats
+    stats = metrics_db.get_stats()
+    low_score = metrics_db.get_low_score_queries(threshold=3.0, limit=5)
+    snapshots = metrics_db.get_snapshots(limit=5)
+    
+    if args.json:
+        output = {
+            "current": stats,
+            "low_score_queries": low_score,
+            "recent_snapshots": snapshots,
+        }
+        jsonio.dump(output)
+    else:
+        lines = [
+            "=== Current Metrics ===",
+            f"Total searches: {stats.get('total_searches', 0)}",
+            f"Avg latency: {stats.get('avg_latency_ms', 0):.1f} ms",
+            f"Avg top score: {stats.get('avg_top_score', 0):.2f}",
+            f"Avg result count: {stats.get('avg_result_count', 0):.1f}",
+            f"Expansion usage: {stats.get('expansion_usage_rate', 0):.1f}%",
+            f"Rerank usage: {stats.get('rerank_usage_rate', 0):.1f}%",
+            f"Cache hit rate: {stats.get('expansion_cache_hit_rate', 0):.1f}%",
+            f"Errors: {stats.get('error_count', 0)}",
+        ]
         
-        if args.json:
-            output = {
-                "current": stats,
-                "low_score_queries": low_score,
-                "recent_snapshots": snapshots,
-            }
-            print(json.dumps(output, indent=2, default=str))
-        else:
-            print("=== Current Metrics ===")
-            print(f"Total searches: {stats.get('total_searches', 0)}")
-            print(f"Avg latency: {stats.get('avg_latency_ms', 0):.1f} ms")
-            print(f"Avg top score: {stats.get('avg_top_score', 0):.2f}")
-            print(f"Avg result count: {stats.get('avg_result_count', 0):.1f}")
-            print(f"Expansion usage: {stats.get('expansion_usage_rate', 0):.1f}%")
-            print(f"Rerank usage: {stats.get('rerank_usage_rate', 0):.1f}%")
-            print(f"Cache hit rate: {stats.get('expansion_cache_hit_rate', 0):.1f}%")
-            print(f"Errors: {stats.get('error_count', 0)}")
-            
-            if low_score:
-                print(f"\n=== Low-Score Queries (need improvement) ===")
-                for q in low_score:
-                    print(f"  {q['query_hash'][:8]}... avg_score={q['avg_score']:.2f} count={q['count']}")
-            
-            if snapshots:
-                print(f"\n=== Recent Snapshots ===")
-                for s in snapshots:
-                    note = s.get('note', '-')[:30] if s.get('note') else '-'
-                    print(f"  #{s['id']} {s['timestamp'][:10]} avg_score={s.get('avg_top_score', 0):.2f} note={note}")
+        if low_score:
+            lines.append("\n=== Low-Score Queries (need improvement) ===")
+            for q in low_score:
+                lines.append(f"  {q['query_hash'][:8]}... avg_score={q['avg_score']:.2f} count={q['count']}")
         
-        # Compare if requested
-        if args.compare:
-            ids = args.compare.split(',')
-            if len(ids) == 2:
-                comparison = metrics_db.compare_snapshots(int(ids[0]), int(ids[1]))
-                print(f"\n=== Comparison ===")
-                if "error" in comparison:
-                    print(f"Error: {comparison['error']}")
-                else:
-                    changes = comparison.get("changes", {})
-                    print(f"From: #{comparison['from']['id']} ({comparison['from']['note']})")
-                    print(f"To: #{comparison['to']['id']} ({comparison['to']['note']})")
-                    
-                    score_change = changes.get('avg_top_score', 0)
-                    indicator = "↑" if score_change > 0 else "↓" if score_change < 0 else "="
-                    print(f"  Avg score: {indicator} {score_change:+.3f}")
-                    
-                    latency_change = changes.get('avg_latency_ms', 0)
-                    indicator = "↑" if latency_change > 0 else "↓" if latency_change < 0 else "="
-                    print(f"  Latency: {indicator} {latency_change:+.1f} ms")
-                    
-                    low_change = changes.get('low_score_queries', 0)
-                    indicator = "↑" if low_change > 0 else "↓" if low_change < 0 else "="
-                    print(f"  Low-score queries: {indicator} {low_change:+d}")
+        if snapshots:
+            lines.append("\n=== Recent Snapshots ===")
+            for s in snapshots:
+                note = s.get('note', '-')[:30] if s.get('note') else '-'
+                lines.append(f"  #{s['id']} {s['timestamp'][:10]} avg_score={s.get('avg_top_score', 0):.2f} note={note}")
         
-        return 0
-    finally:
-        metrics_db.close()
+        print("\n".join(lines))
+    
+    # Compare if requested
+    if args.compare:
+        ids = args.compare.split(',')
+        if len(ids) == 2:
+            comparison = metrics_db.compare_snapshots(int(ids[0]), int(ids[1]))
+            print(f"\n=== Comparison ===")
+            if "error" in comparison:
+                print(f"Error: {comparison['error']}")
+            else:
+                changes = comparison.get("changes", {})
+                print(f"From: #{comparison['from']['id']} ({comparison['from']['note']})")
+                print(f"To: #{comparison['to']['id']} ({comparison['to']['note']})")
+                
+                score_change = changes.get('avg_top_score', 0)
+                indicator = "↑" if score_change > 0 else "↓" if score_change < 0 else "="
+                print(f"  Avg score: {indicator} {score_change:+.3f}")
+                
+                latency_change = changes.get('avg_latency_ms', 0)
+                indicator = "↑" if latency_change > 0 else "↓" if latency_change < 0 else "="
+                print(f"  Latency: {indicator} {latency_change:+.1f} ms")
+                
+                low_change = changes.get('low_score_queries', 0)
+                indicator = "↑" if low_change > 0 else "↓" if low_change < 0 else "="
+                print(f"  Low-score queries: {indicator} {low_change:+d}")
+    
+    return 0
 
 
 def cmd_serve(args):
@@ -472,7 +573,8 @@ def cmd_serve(args):
     return 0
 
 
-def main():
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser for all subcommands"""
     parser = argparse.ArgumentParser(
         prog="localseek",
         description="Local-first full-text search for your documents"
@@ -484,6 +586,8 @@ def main():
     add_parser.add_argument("path", help="Path to folder")
     add_parser.add_argument("-n", "--name", help="Collection name (default: folder name)")
     add_parser.add_argument("-g", "--glob", help="Glob pattern (default: **/*.md)")
+    add_parser.add_argument("--workers", type=int,
+                            help="Threads for reading files (default: LOCALSEEK_INDEX_WORKERS or 1)")
     add_parser.set_defaults(func=cmd_add)
     
     # search
@@ -516,6 +620,10 @@ def main():
     
     # update
     update_parser = subparsers.add_parser("update", help="Re-index all collections")
+    update_parser.add_argument("--bulk", action="store_true",
+                               help="Rebuild the full-text index in one pass (faster when many files changed)")
+    update_parser.add_argument("--workers", type=int,
+                               help="Threads for reading files (default: LOCALSEEK_INDEX_WORKERS or 1)")
     update_parser.set_defaults(func=cmd_update)
     
     # remove
@@ -523,6 +631,10 @@ def main():
     remove_parser.add_argument("name", help="Collection name")
     remove_parser.set_defaults(func=cmd_remove)
     
+    # vacuum
+    vacuum_parser = subparsers.add_parser("vacuum", help="Optimize and compact the index database")
+    vacuum_parser.set_defaults(func=cmd_vacuum)
+    
     # get
     get_parser = subparsers.add_parser("get", help="Get a document")
     get_parser.add_argument("path", help="Document path")
@@ -544,6 +656,19 @@ def main():
     serve_parser.add_argument("--host", default="127.0.0.1", help="Host address (default: 127.0.0.1)")
     serve_parser.set_defaults(func=cmd_serve)
     
+    return parser
+
+
+def _get_parser() -> argparse.ArgumentParser:
+    """Get or build the (cached) argument parser"""
+    global _parser
+    if _parser is None:
+        _parser = _build_parser()
+    return _parser
+
+
+def main():
+    parser = _get_parser()
     args = parser.parse_args()
     
     if not args.command:
@@ -5,14 +5,18 @@ Handles environment variables and defaults.
 """
 
 import os
+from functools import lru_cache
 from pathlib import Path
 from dataclasses import dataclass
 from typing import Optional
 
 
+@lru_cache(maxsize=1)
 def get_cache_dir() -> Path:
-    """Get cache directory, respecting XDG_CACHE_HOME"""
-    cache_home = os.environ.get("XDG_CACHE_HOME", str(Path.home() / ".cache"))
+    """Get cache directory, respecting XDG_CACHE_HOME (resolved once)"""
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    if cache_home is None:
+        cache_home = str(Path.home() / ".cache")
     return Path(cache_home) / "localseek"
 
 
@@ -34,11 +38,13 @@ class Config:
     expand_enabled: bool
     expand_count: int
     expand_cache: bool
+    expand_timeout: int  # seconds the search waits for expansions
     
     # Reranking
     rerank_enabled: bool
     rerank_topk: int
     rerank_cache: bool
+    rerank_workers: int  # concurrent LLM requests, 1 = one prompt for all docs
     
     # Logging
     log_level: str  # off, errors, metrics, debug, full
@@ -47,47 +53,78 @@ class Config:
     cache_enabled: bool
     cache_ttl_days: int
     
+    # In-memory search result cache
+    search_cache_size: int
+    search_cache_ttl: int  # seconds, 0 disables
+    
+    # BM25 column weights (a title match counts this many times a body match)
+    bm25_title_weight: float
+    bm25_content_weight: float
+    
+    # Web search
+    web_cache_ttl: int  # seconds to reuse DuckDuckGo results, 0 disables
+    
+    # Indexing
+    index_workers: int  # threads reading/hashing files, 1 = serial
+    
     @classmethod
     def from_env(cls) -> "Config":
         """Load configuration from environment variables"""
-        cache_dir = get_cache_dir()
+        env = os.environ
+        cache_dir = str(get_cache_dir())
         
         return cls(
             # Core paths
-            db_path=Path(os.environ.get(
+            db_path=Path(env.get(
                 "LOCALSEEK_DB_PATH", 
-                str(cache_dir / "index.sqlite")
+                os.path.join(cache_dir, "index.sqlite")
             )),
-            cache_db_path=Path(os.environ.get(
+            cache_db_path=Path(env.get(
                 "LOCALSEEK_CACHE_DB",
-                str(cache_dir / "cache.sqlite")
+                os.path.join(cache_dir, "cache.sqlite")
             )),
-            metrics_db_path=Path(os.environ.get(
+            metrics_db_path=Path(env.get(
                 "LOCALSEEK_METRICS_DB",
-                str(cache_dir / "metrics.sqlite")
+                os.path.join(cache_dir, "metrics.sqlite")
             )),
             
             # LLM integration (Ollama)
-            llm_url=os.environ.get("LOCALSEEK_LLM_URL", "http://localhost:11434"),
-            llm_timeout=int(os.environ.get("LOCALSEEK_LLM_TIMEOUT", "60")),
-            llm_model=os.environ.get("LOCALSEEK_LLM_MODEL", "qwen2.5:1.5b"),
+            llm_url=env.get("LOCALSEEK_LLM_URL", "http://localhost:11434"),
+            llm_timeout=int(env.get("LOCALSEEK_LLM_TIMEOUT", "60")),
+            llm_model=env.get("LOCALSEEK_LLM_MODEL", "qwen2.5:1.5b"),
             
             # Query expansion
-            expand_enabled=os.environ.get("LOCALSEEK_EXPAND_ENABLED", "true").lower() == "true",
-            expand_count=int(os.environ.get("LOCALSEEK_EXPAND_COUNT", "2")),
-            expand_cache=os.environ.get("LOCALSEEK_EXPAND_CACHE", "true").lower() == "true",
+            expand_enabled=env.get("LOCALSEEK_EXPAND_ENABLED", "true").lower() == "true",
+            expand_count=int(env.get("LOCALSEEK_EXPAND_COUNT", "2")),
+            expand_cache=env.get("LOCALSEEK_EXPAND_CACHE", "true").lower() == "true",
+            expand_timeout=int(env.get("LOCALSEEK_EXPAND_TIMEOUT", "60")),
             
             # Reranking
-            rerank_enabled=os.environ.get("LOCALSEEK_RERANK_ENABLED", "true").lower() == "true",
-            rerank_topk=int(os.environ.get("LOCALSEEK_RERANK_TOPK", "20")),
-            rerank_cache=os.environ.get("LOCALSEEK_RERANK_CACHE", "true").lower() == "true",
+            rerank_enabled=env.get("LOCALSEEK_RERANK_ENABLED", "true").lower() == "true",
+            rerank_topk=int(env.get("LOCALSEEK_RERANK_TOPK", "20")),
+            rerank_cache=env.get("LOCALSEEK_RERANK_CACHE", "true").lower() == "true",
+            rerank_workers=int(env.get("LOCALSEEK_RERANK_WORKERS", "1")),
             
             # Logging
-            log_level=os.environ.get("LOCALSEEK_LOG_LEVEL", "metrics"),
+            log_level=env.get("LOCALSEEK_LOG_LEVEL", "metrics"),
             
             # Cache
-            cache_enabled=os.environ.get("LOCALSEEK_CACHE_ENABLED", "true").lower() == "true",
-            cache_ttl_days=int(os.environ.get("LOCALSEEK_CACHE_TTL_DAYS", "30")),
+            cache_enabled=env.get("LOCALSEEK_CACHE_ENABLED", "true").lower() == "true",
+            cache_ttl_days=int(env.get("LOCALSEEK_CACHE_TTL_DAYS", "30")),
+            
+            # In-memory search result cache
+            search_cache_size=int(env.get("LOCALSEEK_SEARCH_CACHE_SIZE", "1024")),
+            search_cache_ttl=int(env.get("LOCALSEEK_SEARCH_CACHE_TTL", "60")),
+            
+            # BM25 column weights
+            bm25_title_weight=float(env.get("LOCALSEEK_BM25_TITLE_WEIGHT", "10.0")),
+            bm25_content_weight=float(env.get("LOCALSEEK_BM25_CONTENT_WEIGHT", "1.0")),
+            
+            # Web search
+            web_cache_ttl=int(env.get("LOCALSEEK_WEB_CACHE_TTL", "300")),
+            
+            # Indexing
+            index_workers=int(env.get("LOCALSEEK_INDEX_WORKERS", "1")),
         )
 
 
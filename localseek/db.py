@@ -0,0 +1,54 @@
+"""
+SQLite connection settings for localseek
+
+Shared by the index, metrics and LLM cache databases.
+"""
+
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence
+
+
+# WAL lets readers run alongside a writer and, with synchronous=NORMAL,
+# only fsyncs at checkpoints instead of on every commit
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",       # 64 MiB
+    "PRAGMA mmap_size = 268435456",     # 256 MiB
+    "PRAGMA busy_timeout = 3000",       # ms
+)
+
+
+# SQL expression for the current local time in datetime.isoformat() form
+# (millisecond precision), so timestamps are generated inside SQLite
+SQL_NOW = "strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')"
+
+
+def apply_pragmas(conn: sqlite3.Connection):
+    """Apply the shared performance PRAGMAs to a new connection"""
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+
+
+def fetch_dicts(conn: sqlite3.Connection, sql: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+    """
+    Run a query and return its rows as dicts
+    
+    Rows are fetched as plain tuples and zipped with column names read
+    once from cursor.description, instead of converting sqlite3.Row objects.
+    """
+    cursor = conn.execute(sql, params)
+    cursor.row_factory = None
+    keys = [column[0] for column in cursor.description]
+    return [dict(zip(keys, row)) for row in cursor.fetchall()]
+
+
+def fetch_dict(conn: sqlite3.Connection, sql: str, params: Sequence[Any] = ()) -> Optional[Dict[str, Any]]:
+    """Run a query and return its first row as a dict, or None (see fetch_dicts)"""
+    cursor = conn.execute(sql, params)
+    cursor.row_factory = None
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return dict(zip([column[0] for column in cursor.description], row))
@@ -0,0 +1,31 @@
+"""
+Hashing helpers for localseek
+
+BLAKE2b is used for non-security identifiers (query hashes, cache keys,
+document change detection): it is faster than SHA-256 and MD5 and ships with
+hashlib, so no extra dependency is needed.
+
+hashlib is imported on first use: it loads the OpenSSL bindings, which
+commands that never hash (list, status, get) shouldn't pay for.
+"""
+
+
+def query_hash(query: str) -> str:
+    """Anonymous, case/whitespace-insensitive hash of a search query (16 hex chars)"""
+    import hashlib
+    return hashlib.blake2b(query.lower().strip().encode("utf-8"), digest_size=8).hexdigest()
+
+
+def cache_key(text: str) -> str:
+    """Key for the LLM result caches (32 hex chars)"""
+    import hashlib
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def content_hash(data: bytes) -> str:
+    """
+    Hash of a document's raw bytes (or any buffer, e.g. an mmap), used to
+    skip unchanged files (32 hex chars)
+    """
+    import hashlib
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
@@ -5,13 +5,98 @@ Handles document indexing with SQLite FTS5 for full-text search.
 """
 
 import sqlite3
-import hashlib
+import mmap
 import os
+import stat
 from pathlib import Path
-from datetime import datetime
-from typing import Optional, List, Dict, Any
+from itertools import islice
+from typing import Optional, List, Dict, Any, Iterator, Iterable, Tuple, Union
+from contextlib import contextmanager
 import re
 
+from .config import get_cache_dir, get_config
+from .db import SQL_NOW, apply_pragmas, fetch_dicts
+from .hashing import content_hash
+from .search_cache import get_search_cache
+
+
+# Glob patterns of the form "**/*.ext" or "**/*.{ext1,ext2}" can skip
+# pathlib's generic matcher
+_RECURSIVE_SUFFIX_RE = re.compile(
+    r'^\*\*/\*\.(?:\{([^{}*?\[\]/\\]+)\}|([^{}*?\[\]/\\,]+))$'
+)
+
+
+# Titles come from the first H1 or a frontmatter "title:" near the top
+_H1_RE = re.compile(r'^#\s+(.+)$', re.MULTILINE)
+_FM_TITLE_RE = re.compile(r'^title:\s*["\']?(.+?)["\']?\s*$', re.MULTILINE)
+_TITLE_SCAN_CHARS = 4096
+
+
+# Files at least this large are hashed and decoded straight from an mmap
+MMAP_THRESHOLD = 256 * 1024
+
+# Rows buffered per executemany() call while indexing
+INSERT_BATCH_SIZE = 1000
+
+_UPSERT_DOCUMENT_SQL = f"""
+    INSERT INTO documents (collection_id, path, title, content, hash, mtime_ns, size, indexed_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, {SQL_NOW})
+    ON CONFLICT(collection_id, path) DO UPDATE SET
+        title = excluded.title,
+        content = excluded.content,
+        hash = excluded.hash,
+        mtime_ns = excluded.mtime_ns,
+        size = excluded.size,
+        indexed_at = excluded.indexed_at
+"""
+
+# Touched but unchanged files: refresh the stat fields only (no FTS work)
+_UPDATE_STAT_SQL = """
+    UPDATE documents SET mtime_ns = ?, size = ?
+    WHERE collection_id = ? AND path = ?
+"""
+
+
+# Stemmed, case- and accent-insensitive terms. remove_diacritics 2 also
+# folds letters with several diacritics, which 1 (the default) leaves alone
+_FTS_TOKENIZE = "porter unicode61 remove_diacritics 2"
+
+_FTS_TABLE_SQL = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+        title,
+        content,
+        content='documents',
+        content_rowid='id',
+        tokenize='{_FTS_TOKENIZE}'
+    )
+"""
+
+# Triggers that keep documents_fts in sync row by row. Bulk reindexing
+# drops them and rebuilds the FTS index once at the end instead.
+_FTS_TRIGGERS = {
+    "documents_ai": """
+        CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+            INSERT INTO documents_fts(rowid, title, content) 
+            VALUES (new.id, new.title, new.content);
+        END
+    """,
+    "documents_ad": """
+        CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+            INSERT INTO documents_fts(documents_fts, rowid, title, content) 
+            VALUES ('delete', old.id, old.title, old.content);
+        END
+    """,
+    "documents_au": """
+        CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE OF title, content ON documents BEGIN
+            INSERT INTO documents_fts(documents_fts, rowid, title, content) 
+            VALUES ('delete', old.id, old.title, old.content);
+            INSERT INTO documents_fts(rowid, title, content) 
+            VALUES (new.id, new.title, new.content);
+        END
+    """,
+}
+
 
 # Default database location
 DEFAULT_DB_PATH = Path.home() / ".cache" / "localseek" / "index.sqlite"
@@ -19,8 +104,68 @@ DEFAULT_DB_PATH = Path.home() / ".cache" / "localseek" / "index.sqlite"
 
 def get_db_path() -> Path:
     """Get database path, respecting XDG_CACHE_HOME"""
-    cache_home = os.environ.get("XDG_CACHE_HOME", str(Path.home() / ".cache"))
-    return Path(cache_home) / "localseek" / "index.sqlite"
+    return get_cache_dir() / "index.sqlite"
+
+
+def _recursive_suffixes(glob_pattern: str) -> Optional[Tuple[str, ...]]:
+    """File suffixes for "**/*.ext"-style patterns, None for anything else"""
+    match = _RECURSIVE_SUFFIX_RE.match(glob_pattern)
+    if not match:
+        return None
+    
+    extensions = match.group(1).split(",") if match.group(1) else [match.group(2)]
+    suffixes = tuple(os.path.normcase("." + ext.strip()) for ext in extensions if ext.strip())
+    return suffixes or None
+
+
+def _walk_suffix(base_path: str, suffixes: Tuple[str, ...]) -> Iterator[os.DirEntry]:
+    """
+    Yield entries for files under base_path whose name ends with one of suffixes
+    
+    Equivalent to Path(base_path).glob("**/*" + suffix) filtered to files
+    (symlinked directories are not descended into), but walks with
+    os.scandir, reusing its cached d_type instead of stat-ing every entry.
+    """
+    stack = [base_path]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif (os.path.normcase(entry.name).endswith(suffixes)
+                              and entry.is_file()):
+                            yield entry
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def _load_document(full_path: str) -> Union[Tuple[str, str], Exception]:
+    """Read and hash a file; returns (content, hash) or the error raised"""
+    try:
+        with open(full_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size >= MMAP_THRESHOLD:
+                # No intermediate bytes copy unless newlines need fixing
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    digest = content_hash(mm)
+                    if mm.find(b"\r") == -1:
+                        return str(mm, "utf-8"), digest
+                    data = mm[:]
+            else:
+                data = f.read()
+                # Hash the bytes as read; decode once for SQLite (TEXT must be str)
+                digest = content_hash(data)
+        if b"\r" in data:
+            # Same newline handling as reading in text mode
+            data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        content = data.decode("utf-8")
+    except Exception as e:
+        return e
+    return content, digest
 
 
 def init_db(db_path: Optional[Path] = None) -> sqlite3.Connection:
@@ -28,8 +173,11 @@ def init_db(db_path: Optional[Path] = None) -> sqlite3.Connection:
     db_path = db_path or get_db_path()
     db_path.parent.mkdir(parents=True, exist_ok=True)
     
-    conn = sqlite3.connect(str(db_path))
+    # Searchers and Indexers may be handed between threads (the web UI
+    # reuses them across requests), though only one uses them at a time
+    conn = sqlite3.connect(str(db_path), check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    apply_pragmas(conn)
     
     # Enable foreign keys
     conn.execute("PRAGMA foreign_keys = ON")
@@ -54,38 +202,40 @@ def init_db(db_path: Optional[Path] = None) -> sqlite3.Connection:
             title TEXT,
             content TEXT,
             hash TEXT,
+            mtime_ns INTEGER,
+            size INTEGER,
             indexed_at TEXT DEFAULT CURRENT_TIMESTAMP,
             UNIQUE(collection_id, path)
         );
-        
-        -- FTS5 Virtual Table
-        CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
-            title,
-            content,
-            content='documents',
-            content_rowid='id',
-            tokenize='porter unicode61'
-        );
-        
-        -- Triggers to keep FTS in sync
-        CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
-            INSERT INTO documents_fts(rowid, title, content) 
-            VALUES (new.id, new.title, new.content);
-        END;
-        
-        CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
-            INSERT INTO documents_fts(documents_fts, rowid, title, content) 
-            VALUES ('delete', old.id, old.title, old.content);
-        END;
-        
-        CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE ON documents BEGIN
-            INSERT INTO documents_fts(documents_fts, rowid, title, content) 
-            VALUES ('delete', old.id, old.title, old.content);
-            INSERT INTO documents_fts(rowid, title, content) 
-            VALUES (new.id, new.title, new.content);
-        END;
     """)
     
+    # FTS5 Virtual Table
+    conn.execute(_FTS_TABLE_SQL)
+    
+    # Indexes created before files were stat-checked: add the columns and
+    # replace the update trigger, which used to fire on any column
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(documents)")}
+    if "mtime_ns" not in columns:
+        conn.execute("ALTER TABLE documents ADD COLUMN mtime_ns INTEGER")
+        conn.execute("ALTER TABLE documents ADD COLUMN size INTEGER")
+        conn.execute("DROP TRIGGER IF EXISTS documents_au")
+    
+    # Indexes created with an older tokenizer: recreate the FTS table and
+    # rebuild it from documents (the content table) in one transaction
+    fts_sql = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE name = 'documents_fts'"
+    ).fetchone()[0]
+    if _FTS_TOKENIZE not in fts_sql:
+        conn.execute("BEGIN")
+        conn.execute("DROP TABLE documents_fts")
+        conn.execute(_FTS_TABLE_SQL)
+        conn.execute("INSERT INTO documents_fts(documents_fts) VALUES ('rebuild')")
+        conn.commit()
+    
+    # Triggers to keep FTS in sync
+    for trigger_sql in _FTS_TRIGGERS.values():
+        conn.execute(trigger_sql)
+    
     conn.commit()
     return conn
 
@@ -93,9 +243,12 @@ def init_db(db_path: Optional[Path] = None) -> sqlite3.Connection:
 class Indexer:
     """Document indexer using SQLite FTS5"""
     
-    def __init__(self, db_path: Optional[Path] = None):
+    def __init__(self, db_path: Optional[Path] = None, workers: Optional[int] = None):
         self.db_path = db_path or get_db_path()
         self.conn = init_db(self.db_path)
+        # Threads used to read and hash files; database writes stay on
+        # the calling thread
+        self.workers = workers or get_config().index_workers
     
     def add_collection(
         self, 
@@ -108,18 +261,22 @@ class Indexer:
         
         # Check if collection exists
         existing = self.conn.execute(
-            "SELECT id FROM collections WHERE name = ?", (name,)
+            "SELECT id, path, glob_pattern FROM collections WHERE name = ?",
+            (name,)
         ).fetchone()
         
         if existing:
-            # Update existing collection
-            self.conn.execute(
-                """UPDATE collections 
-                   SET path = ?, glob_pattern = ?, updated_at = ?
-                   WHERE name = ?""",
-                (abs_path, glob_pattern, datetime.now().isoformat(), name)
-            )
             collection_id = existing["id"]
+            
+            # Re-adding with the same settings is just an incremental update
+            if (existing["path"], existing["glob_pattern"]) != (abs_path, glob_pattern):
+                self.conn.execute(
+                    f"""UPDATE collections 
+                       SET path = ?, glob_pattern = ?, updated_at = {SQL_NOW}
+                       WHERE name = ?""",
+                    (abs_path, glob_pattern, name)
+                )
+                get_search_cache().clear()
         else:
             # Create new collection
             cursor = self.conn.execute(
@@ -131,12 +288,77 @@ class Indexer:
         
         self.conn.commit()
         
-        # Index documents
-        indexed = self.index_collection(collection_id)
-        return indexed
+        # Index documents; a first collection in an empty index is loaded
+        # in bulk since the FTS rebuild then only covers the new rows
+        if not existing and self._is_empty():
+            return self.bulk_reindex([collection_id])[name]
+        return self.index_collection(collection_id)
     
     def index_collection(self, collection_id: int) -> int:
         """Index all documents in a collection"""
+        indexed_count, removed_count = self._sync_collection(collection_id)
+        self.conn.commit()
+        
+        if indexed_count or removed_count:
+            # Refresh planner stats where the writes made them stale
+            self.conn.execute("PRAGMA optimize")
+            get_search_cache().clear()
+        return indexed_count
+    
+    def bulk_reindex(self, collection_ids: Optional[List[int]] = None) -> Dict[str, int]:
+        """
+        Re-index collections with FTS triggers disabled
+        
+        The FTS index is rebuilt once at the end instead of being updated
+        row by row, which is much faster when many documents change but
+        always costs a full rebuild (all collections).
+        
+        Args:
+            collection_ids: Collections to re-index (default: all)
+        
+        Returns:
+            Number of documents indexed per collection name
+        """
+        collections = self.list_collections()
+        if collection_ids is not None:
+            wanted = set(collection_ids)
+            collections = [c for c in collections if c["id"] in wanted]
+        
+        results = {}
+        with self._fts_bulk():
+            for collection in collections:
+                indexed_count, _ = self._sync_collection(collection["id"])
+                results[collection["name"]] = indexed_count
+        
+        self.conn.execute("PRAGMA optimize")
+        get_search_cache().clear()
+        return results
+    
+    @contextmanager
+    def _fts_bulk(self):
+        """Drop the FTS triggers, then rebuild the FTS index, in one transaction"""
+        self.conn.commit()
+        self.conn.execute("BEGIN")
+        try:
+            for name in _FTS_TRIGGERS:
+                self.conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            
+            yield
+            
+            self.conn.execute("INSERT INTO documents_fts(documents_fts) VALUES ('rebuild')")
+            for trigger_sql in _FTS_TRIGGERS.values():
+                self.conn.execute(trigger_sql)
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+    
+    def _is_empty(self) -> bool:
+        """Whether the index holds no documents at all"""
+        return self.conn.execute("SELECT 1 FROM documents LIMIT 1").fetchone() is None
+    
+    def _sync_collection(self, collection_id: int) -> Tuple[int, int]:
+        """Bring a collection's documents up to date (without committing)"""
         collection = self.conn.execute(
             "SELECT * FROM collections WHERE id = ?", (collection_id,)
         ).fetchone()
@@ -144,82 +366,148 @@ class Indexer:
         if not collection:
             raise ValueError(f"Collection {collection_id} not found")
         
-        base_path = Path(collection["path"])
+        base_path = collection["path"]
         glob_pattern = collection["glob_pattern"]
         
-        # Get existing documents
+        # Get existing documents: path -> (hash, mtime_ns, size)
         existing = {
-            row["path"]: row["hash"]
+            row["path"]: (row["hash"], row["mtime_ns"], row["size"])
             for row in self.conn.execute(
-                "SELECT path, hash FROM documents WHERE collection_id = ?",
+                "SELECT path, hash, mtime_ns, size FROM documents WHERE collection_id = ?",
                 (collection_id,)
             ).fetchall()
         }
         
         indexed_count = 0
         seen_paths = set()
+        batch = []
+        touched = []
         
-        # Find and index files
-        for file_path in base_path.glob(glob_pattern):
-            if not file_path.is_file():
-                continue
-            
-            rel_path = str(file_path.relative_to(base_path))
-            seen_paths.add(rel_path)
-            
-            try:
-                content = file_path.read_text(encoding="utf-8")
-            except Exception as e:
-                print(f"  Skip {rel_path}: {e}")
+        def changed_files() -> Iterator[Tuple[str, str, os.stat_result]]:
+            """Files whose mtime or size differ from what was indexed"""
+            for full_path, rel_path, st in self._find_files(base_path, glob_pattern):
+                seen_paths.add(rel_path)
+                known = existing.get(rel_path)
+                if known is not None and known[1:] == (st.st_mtime_ns, st.st_size):
+                    continue
+                yield full_path, rel_path, st
+        
+        # Read only files that may have changed (all writes share one transaction)
+        for full_path, rel_path, st, loaded in self._load_files(changed_files()):
+            if isinstance(loaded, Exception):
+                print(f"  Skip {rel_path}: {loaded}")
                 continue
             
-            content_hash = hashlib.md5(content.encode()).hexdigest()
+            # Rows hashed by older versions (MD5) never match and are
+            # re-indexed once
+            content, digest = loaded
             
-            # Skip if unchanged
-            if rel_path in existing and existing[rel_path] == content_hash:
+            # Same content, new stat (touched, copied, checked out again)
+            known = existing.get(rel_path)
+            if known is not None and known[0] == digest:
+                touched.append((st.st_mtime_ns, st.st_size, collection_id, rel_path))
                 continue
             
             # Extract title
-            title = self._extract_title(content, file_path.stem)
+            stem = os.path.splitext(os.path.basename(full_path))[0]
+            title = self._extract_title(content, stem)
             
-            # Upsert document
-            self.conn.execute(
-                """INSERT INTO documents (collection_id, path, title, content, hash, indexed_at)
-                   VALUES (?, ?, ?, ?, ?, ?)
-                   ON CONFLICT(collection_id, path) DO UPDATE SET
-                       title = excluded.title,
-                       content = excluded.content,
-                       hash = excluded.hash,
-                       indexed_at = excluded.indexed_at""",
-                (collection_id, rel_path, title, content, content_hash, 
-                 datetime.now().isoformat())
-            )
+            # Queue upsert
+            batch.append((collection_id, rel_path, title, content, digest,
+                          st.st_mtime_ns, st.st_size))
             indexed_count += 1
+            if len(batch) >= INSERT_BATCH_SIZE:
+                self.conn.executemany(_UPSERT_DOCUMENT_SQL, batch)
+                batch.clear()
+        
+        if batch:
+            self.conn.executemany(_UPSERT_DOCUMENT_SQL, batch)
+        if touched:
+            self.conn.executemany(_UPDATE_STAT_SQL, touched)
         
-        # Remove deleted documents
-        for old_path in existing.keys() - seen_paths:
+        # Remove deleted documents with one DELETE joined against a temp table
+        removed = existing.keys() - seen_paths
+        if removed:
             self.conn.execute(
-                "DELETE FROM documents WHERE collection_id = ? AND path = ?",
-                (collection_id, old_path)
+                "CREATE TEMP TABLE IF NOT EXISTS removed_paths (path TEXT PRIMARY KEY)"
             )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO removed_paths (path) VALUES (?)",
+                [(old_path,) for old_path in removed]
+            )
+            self.conn.execute(
+                """DELETE FROM documents
+                   WHERE collection_id = ? AND path IN (SELECT path FROM removed_paths)""",
+                (collection_id,)
+            )
+            self.conn.execute("DELETE FROM removed_paths")
         
-        self.conn.commit()
-        return indexed_count
+        return indexed_count, len(removed)
+    
+    def _find_files(
+        self, base_path: str, glob_pattern: str
+    ) -> Iterator[Tuple[str, str, os.stat_result]]:
+        """Yield (full_path, rel_path, stat) for files in base_path matching glob_pattern"""
+        suffixes = _recursive_suffixes(glob_pattern)
+        if suffixes:
+            # Paths stay plain strings; rel_path is a slice, not relative_to()
+            prefix_len = len(os.path.join(base_path, ""))
+            for entry in _walk_suffix(base_path, suffixes):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                yield entry.path, entry.path[prefix_len:], st
+            return
+        
+        base = Path(base_path)
+        for file_path in base.glob(glob_pattern):
+            try:
+                st = file_path.stat()
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                yield str(file_path), str(file_path.relative_to(base)), st
+    
+    def _load_files(
+        self, files: Iterable[Tuple[str, str, os.stat_result]]
+    ) -> Iterator[Tuple[str, str, os.stat_result, Union[Tuple[str, str], Exception]]]:
+        """Yield (full_path, rel_path, stat, _load_document result) in walk order"""
+        if self.workers <= 1:
+            for full_path, rel_path, st in files:
+                yield full_path, rel_path, st, _load_document(full_path)
+            return
+        
+        from concurrent.futures import ThreadPoolExecutor
+        
+        # File reads and hashing release the GIL; load a bounded chunk at a
+        # time so large trees aren't held in memory all at once
+        files = iter(files)
+        with ThreadPoolExecutor(max_workers=self.workers,
+                                thread_name_prefix="localseek-index") as pool:
+            while True:
+                chunk = list(islice(files, self.workers * 64))
+                if not chunk:
+                    break
+                loaded = pool.map(_load_document, [item[0] for item in chunk])
+                for (full_path, rel_path, st), result in zip(chunk, loaded):
+                    yield full_path, rel_path, st, result
     
     def _extract_title(self, content: str, fallback: str) -> str:
         """Extract title from markdown content"""
+        head = content[:_TITLE_SCAN_CHARS]
+        
         # Try to find first H1
-        match = re.search(r'^#\s+(.+)$', content, re.MULTILINE)
+        match = _H1_RE.search(head)
         if match:
             return match.group(1).strip()
         
         # Try frontmatter title
-        if content.startswith("---"):
-            end = content.find("---", 3)
+        if head.startswith("---"):
+            end = head.find("---", 3)
             if end > 0:
-                frontmatter = content[3:end]
-                title_match = re.search(r'^title:\s*["\']?(.+?)["\']?\s*$', 
-                                        frontmatter, re.MULTILINE)
+                frontmatter = head[3:end]
+                title_match = _FM_TITLE_RE.search(frontmatter)
                 if title_match:
                     return title_match.group(1).strip()
         
@@ -232,18 +520,18 @@ class Indexer:
             "DELETE FROM collections WHERE name = ?", (name,)
         )
         self.conn.commit()
+        get_search_cache().clear()
         return cursor.rowcount > 0
     
     def list_collections(self) -> List[Dict[str, Any]]:
         """List all collections with document counts"""
-        rows = self.conn.execute("""
+        return fetch_dicts(self.conn, """
             SELECT c.*, COUNT(d.id) as doc_count
             FROM collections c
             LEFT JOIN documents d ON d.collection_id = c.id
             GROUP BY c.id
             ORDER BY c.name
-        """).fetchall()
-        return [dict(row) for row in rows]
+        """)
     
     def get_stats(self) -> Dict[str, Any]:
         """Get index statistics"""
@@ -265,13 +553,29 @@ class Indexer:
             "db_path": str(self.db_path)
         }
     
-    def update_all(self) -> Dict[str, int]:
-        """Re-index all collections"""
+    def update_all(self, bulk: bool = False) -> Dict[str, int]:
+        """Re-index all collections (bulk: see bulk_reindex)"""
+        if bulk:
+            return self.bulk_reindex()
+        
         results = {}
         for collection in self.list_collections():
             results[collection["name"]] = self.index_collection(collection["id"])
         return results
     
+    def vacuum_and_analyze(self):
+        """
+        Full maintenance pass: merge the FTS index segments, refresh planner
+        statistics and compact the database file. Slow on large indexes.
+        """
+        self.conn.commit()
+        self.conn.execute("INSERT INTO documents_fts(documents_fts) VALUES ('optimize')")
+        self.conn.commit()
+        self.conn.execute("ANALYZE")
+        self.conn.execute("VACUUM")
+        # Fold the WAL back in so the main file reflects the new size
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    
     def close(self):
         """Close database connection"""
         self.conn.close()
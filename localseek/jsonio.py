@@ -0,0 +1,72 @@
+"""
+JSON output helpers for localseek
+
+Uses orjson when it is installed (pip install localseek[fast]) and falls
+back to the stdlib json module otherwise. Output is equivalent either way.
+"""
+
+import json
+import sys
+from typing import Any, Optional, TextIO, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(o: Any) -> Any:
+    """Serialize __slots__ objects (e.g. SearchResult) field by field"""
+    slots = getattr(o, "__slots__", None)
+    if slots is not None:
+        return {name: getattr(o, name) for name in slots}
+    return str(o)
+
+
+def dumps(obj: Any, indent: bool = True) -> str:
+    """Serialize obj to a JSON string"""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, default=_default, option=option).decode("utf-8")
+    return json.dumps(obj, indent=2 if indent else None, default=_default)
+
+
+def dumpb(obj: Any) -> bytes:
+    """Serialize obj to compact UTF-8 JSON bytes (request bodies, DB columns)"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Parse JSON from bytes or str
+
+    Raises json.JSONDecodeError (orjson's error subclasses it) on bad input.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dump(obj: Any, fp: Optional[TextIO] = None, indent: bool = True):
+    """Write obj as JSON followed by a newline to fp (default: stdout)"""
+    fp = fp or sys.stdout
+
+    if orjson is not None:
+        option = orjson.OPT_APPEND_NEWLINE
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        data = orjson.dumps(obj, default=_default, option=option)
+
+        buffer = getattr(fp, "buffer", None)
+        if buffer is not None:
+            fp.flush()
+            buffer.write(data)
+            buffer.flush()
+        else:
+            fp.write(data.decode("utf-8"))
+        return
+
+    json.dump(obj, fp, indent=2 if indent else None, default=_default)
+    fp.write("\n")
@@ -4,15 +4,44 @@ Metrics and logging for localseek
 Provides anonymous metrics collection for improving search quality.
 """
 
+import atexit
+import queue
 import sqlite3
-import hashlib
+import threading
 import time
 from pathlib import Path
-from datetime import datetime
 from typing import Optional, Dict, Any, List
 from dataclasses import dataclass, field
 
 from .config import get_config
+from .db import SQL_NOW, apply_pragmas, fetch_dicts
+from .hashing import query_hash
+
+
+_INSERT_EVENT_SQL = f"""
+    INSERT INTO search_events 
+    (timestamp, query_hash, query_length, collection_filter,
+     result_count, top_score, latency_ms,
+     used_expansion, used_rerank, cache_hit_expansion, cache_hit_rerank, error)
+    VALUES ({SQL_NOW}, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Adds one search event to today's daily_metrics totals
+_ROLLUP_EVENT_SQL = """
+    INSERT INTO daily_metrics
+    (date, total_searches, sum_latency_ms, sum_result_count, sum_top_score,
+     expansion_count, rerank_count, expansion_cache_hits, error_count)
+    VALUES (date('now', 'localtime'), 1, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(date) DO UPDATE SET
+        total_searches = total_searches + 1,
+        sum_latency_ms = sum_latency_ms + excluded.sum_latency_ms,
+        sum_result_count = sum_result_count + excluded.sum_result_count,
+        sum_top_score = sum_top_score + excluded.sum_top_score,
+        expansion_count = expansion_count + excluded.expansion_count,
+        rerank_count = rerank_count + excluded.rerank_count,
+        expansion_cache_hits = expansion_cache_hits + excluded.expansion_cache_hits,
+        error_count = error_count + excluded.error_count
+"""
 
 
 @dataclass
@@ -36,7 +65,7 @@ class SearchMetrics:
     def start(cls, query: str, collection: Optional[str] = None) -> "SearchMetrics":
         """Start tracking a new search"""
         return cls(
-            query_hash=hashlib.sha256(query.lower().strip().encode()).hexdigest()[:16],
+            query_hash=query_hash(query),
             query_length=len(query),
             collection_filter=collection,
             _start_time=time.time(),
@@ -71,6 +100,10 @@ class SearchMetrics:
 class MetricsDB:
     """Database for storing search metrics"""
     
+    # record() buffers rows and writes them once either limit is reached
+    record_batch_size = 32
+    record_flush_interval = 1.0  # seconds
+    
     def __init__(self, db_path: Optional[Path] = None):
         config = get_config()
         self.db_path = db_path or config.metrics_db_path
@@ -80,9 +113,17 @@ class MetricsDB:
         if self.log_level == "off":
             self.conn = None
         else:
-            self.conn = sqlite3.connect(str(self.db_path))
+            # Shared with the AsyncMetricsRecorder thread; writes hold _lock.
+            # Autocommit mode: batched writes manage their own transaction
+            self.conn = sqlite3.connect(
+                str(self.db_path), isolation_level=None, check_same_thread=False
+            )
             self.conn.row_factory = sqlite3.Row
+            apply_pragmas(self.conn)
             self._init_schema()
+        self._lock = threading.Lock()
+        self._buffer: List[tuple] = []
+        self._last_flush = time.monotonic()
     
     def _init_schema(self):
         if not self.conn:
@@ -116,30 +157,62 @@ class MetricsDB:
                 feedback INTEGER
             );
             
+            -- Per-day totals, maintained on insert so stats don't
+            -- rescan search_events
+            CREATE TABLE IF NOT EXISTS daily_metrics (
+                date TEXT PRIMARY KEY,
+                total_searches INTEGER NOT NULL DEFAULT 0,
+                sum_latency_ms INTEGER NOT NULL DEFAULT 0,
+                sum_result_count INTEGER NOT NULL DEFAULT 0,
+                sum_top_score REAL NOT NULL DEFAULT 0,
+                expansion_count INTEGER NOT NULL DEFAULT 0,
+                rerank_count INTEGER NOT NULL DEFAULT 0,
+                expansion_cache_hits INTEGER NOT NULL DEFAULT 0,
+                error_count INTEGER NOT NULL DEFAULT 0
+            );
+            
             -- Indexes
             CREATE INDEX IF NOT EXISTS idx_events_timestamp 
             ON search_events(timestamp);
             CREATE INDEX IF NOT EXISTS idx_events_hash 
             ON search_events(query_hash);
+            -- Covers get_low_score_queries() (index-only GROUP BY)
+            CREATE INDEX IF NOT EXISTS idx_events_hash_score 
+            ON search_events(query_hash, top_score, latency_ms)
+            WHERE top_score > 0;
         """)
+        
+        # Databases from before daily_metrics existed: build it once
+        if self.conn.execute("SELECT 1 FROM daily_metrics LIMIT 1").fetchone() is None:
+            self.conn.execute("""
+                INSERT INTO daily_metrics
+                (date, total_searches, sum_latency_ms, sum_result_count, sum_top_score,
+                 expansion_count, rerank_count, expansion_cache_hits, error_count)
+                SELECT substr(timestamp, 1, 10),
+                       COUNT(*),
+                       COALESCE(SUM(latency_ms), 0),
+                       COALESCE(SUM(result_count), 0),
+                       COALESCE(SUM(top_score), 0),
+                       SUM(CASE WHEN used_expansion THEN 1 ELSE 0 END),
+                       SUM(CASE WHEN used_rerank THEN 1 ELSE 0 END),
+                       SUM(CASE WHEN cache_hit_expansion THEN 1 ELSE 0 END),
+                       SUM(CASE WHEN error IS NOT NULL THEN 1 ELSE 0 END)
+                FROM search_events
+                GROUP BY substr(timestamp, 1, 10)
+            """)
         self.conn.commit()
     
-    def record(self, metrics: SearchMetrics):
-        """Record search metrics"""
+    def should_record(self, metrics: SearchMetrics) -> bool:
+        """Whether the current log level keeps this event"""
         if not self.conn or self.log_level == "off":
-            return
-        
+            return False
         if self.log_level == "errors" and not metrics.error:
-            return
-        
-        self.conn.execute("""
-            INSERT INTO search_events 
-            (timestamp, query_hash, query_length, collection_filter,
-             result_count, top_score, latency_ms,
-             used_expansion, used_rerank, cache_hit_expansion, cache_hit_rerank, error)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            datetime.now().isoformat(),
+            return False
+        return True
+    
+    def event_row(self, metrics: SearchMetrics) -> tuple:
+        """Snapshot metrics as a search_events row (fixes latency_ms now)"""
+        return (
             metrics.query_hash,
             metrics.query_length,
             metrics.collection_filter,
@@ -151,8 +224,59 @@ class MetricsDB:
             metrics.cache_hit_expansion,
             metrics.cache_hit_rerank,
             metrics.error,
-        ))
-        self.conn.commit()
+        )
+    
+    def record(self, metrics: SearchMetrics):
+        """Record search metrics (buffered; see flush())"""
+        if not self.should_record(metrics):
+            return
+        
+        row = self.event_row(metrics)
+        with self._lock:
+            self._buffer.append(row)
+            due = (
+                len(self._buffer) >= self.record_batch_size
+                or time.monotonic() - self._last_flush >= self.record_flush_interval
+            )
+        if due:
+            self.flush()
+    
+    def flush(self):
+        """Write rows buffered by record()"""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+        self.record_rows(rows)
+    
+    def record_rows(self, rows: List[tuple]):
+        """Insert several search_events rows in a single transaction"""
+        if not self.conn or not rows:
+            return
+        
+        rollup = [
+            (
+                latency_ms or 0,
+                result_count or 0,
+                top_score or 0.0,
+                1 if used_expansion else 0,
+                1 if used_rerank else 0,
+                1 if cache_hit_expansion else 0,
+                1 if error is not None else 0,
+            )
+            for (_, _, _, result_count, top_score, latency_ms,
+                 used_expansion, used_rerank, cache_hit_expansion, _, error) in rows
+        ]
+        
+        with self._lock:
+            # Take the write lock up front: one transaction, one commit
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(_INSERT_EVENT_SQL, rows)
+                self.conn.executemany(_ROLLUP_EVENT_SQL, rollup)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
     
     def record_query(
         self, 
@@ -167,11 +291,10 @@ class MetricsDB:
         
         import json
         
-        self.conn.execute("""
+        self.conn.execute(f"""
             INSERT INTO query_log (timestamp, query, expansions, results, feedback)
-            VALUES (?, ?, ?, ?, ?)
+            VALUES ({SQL_NOW}, ?, ?, ?, ?)
         """, (
-            datetime.now().isoformat(),
             query,
             json.dumps(expansions) if expansions else None,
             json.dumps(results) if results else None,
@@ -184,24 +307,25 @@ class MetricsDB:
         if not self.conn:
             return {"logging": "disabled"}
         
-        from_date = datetime.now().isoformat()[:10]  # Simplified
+        self.flush()
         
+        # One row per day rather than per search
         row = self.conn.execute("""
             SELECT 
-                COUNT(*) as total_searches,
-                AVG(latency_ms) as avg_latency_ms,
-                AVG(result_count) as avg_result_count,
-                AVG(top_score) as avg_top_score,
-                SUM(CASE WHEN used_expansion THEN 1 ELSE 0 END) * 100.0 / COUNT(*) as expansion_rate,
-                SUM(CASE WHEN used_rerank THEN 1 ELSE 0 END) * 100.0 / COUNT(*) as rerank_rate,
-                SUM(CASE WHEN cache_hit_expansion THEN 1 ELSE 0 END) * 100.0 / 
-                    NULLIF(SUM(CASE WHEN used_expansion THEN 1 ELSE 0 END), 0) as expansion_cache_rate,
-                SUM(CASE WHEN error IS NOT NULL THEN 1 ELSE 0 END) as error_count
-            FROM search_events
+                SUM(total_searches) as total_searches,
+                SUM(sum_latency_ms) * 1.0 / SUM(total_searches) as avg_latency_ms,
+                SUM(sum_result_count) * 1.0 / SUM(total_searches) as avg_result_count,
+                SUM(sum_top_score) / SUM(total_searches) as avg_top_score,
+                SUM(expansion_count) * 100.0 / SUM(total_searches) as expansion_rate,
+                SUM(rerank_count) * 100.0 / SUM(total_searches) as rerank_rate,
+                SUM(expansion_cache_hits) * 100.0 / 
+                    NULLIF(SUM(expansion_count), 0) as expansion_cache_rate,
+                SUM(error_count) as error_count
+            FROM daily_metrics
         """).fetchone()
         
         return {
-            "total_searches": row["total_searches"],
+            "total_searches": row["total_searches"] or 0,
             "avg_latency_ms": round(row["avg_latency_ms"] or 0, 1),
             "avg_result_count": round(row["avg_result_count"] or 0, 1),
             "avg_top_score": round(row["avg_top_score"] or 0, 2),
@@ -216,7 +340,8 @@ class MetricsDB:
         if not self.conn:
             return []
         
-        rows = self.conn.execute("""
+        self.flush()
+        return fetch_dicts(self.conn, """
             SELECT query_hash, 
                    AVG(top_score) as avg_score, 
                    COUNT(*) as count,
@@ -227,9 +352,7 @@ class MetricsDB:
             HAVING avg_score < ?
             ORDER BY count DESC
             LIMIT ?
-        """, (threshold, limit)).fetchall()
-        
-        return [dict(row) for row in rows]
+        """, (threshold, limit))
     
     def save_snapshot(self, note: Optional[str] = None) -> int:
         """Save a metrics snapshot for tracking improvements over time"""
@@ -260,14 +383,13 @@ class MetricsDB:
         low_score = self.get_low_score_queries()
         config = get_config()
         
-        cursor = self.conn.execute("""
+        cursor = self.conn.execute(f"""
             INSERT INTO metrics_snapshots 
             (timestamp, note, total_searches, avg_latency_ms, avg_result_count,
              avg_top_score, expansion_usage_rate, rerank_usage_rate, cache_hit_rate,
              error_count, config_expand_count, config_rerank_topk, low_score_query_count)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            VALUES ({SQL_NOW}, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
-            datetime.now().isoformat(),
             note,
             stats.get("total_searches", 0),
             stats.get("avg_latency_ms", 0),
@@ -282,6 +404,7 @@ class MetricsDB:
             len(low_score),
         ))
         self.conn.commit()
+        self.conn.execute("PRAGMA optimize")
         return cursor.lastrowid
     
     def get_snapshots(self, limit: int = 10) -> List[Dict]:
@@ -290,12 +413,11 @@ class MetricsDB:
             return []
         
         try:
-            rows = self.conn.execute("""
+            return fetch_dicts(self.conn, """
                 SELECT * FROM metrics_snapshots
                 ORDER BY timestamp DESC
                 LIMIT ?
-            """, (limit,)).fetchall()
-            return [dict(row) for row in rows]
+            """, (limit,))
         except sqlite3.OperationalError:
             return []  # Table doesn't exist yet
     
@@ -331,11 +453,87 @@ class MetricsDB:
     
     def close(self):
         if self.conn:
-            self.conn.close()
+            self.flush()
+            with self._lock:
+                self.conn.close()
+
+
+class AsyncMetricsRecorder:
+    """
+    Records search metrics off the search path
+    
+    Events are queued and written by a background thread in batches of up
+    to `batch_size`, or whatever arrived within `flush_interval` seconds.
+    close() (run at exit) drains the queue before returning.
+    """
+    
+    def __init__(
+        self,
+        metrics_db: MetricsDB,
+        batch_size: int = 32,
+        flush_interval: float = 1.0,
+    ):
+        self.metrics_db = metrics_db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.SimpleQueue[Optional[tuple]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+    
+    def enqueue(self, metrics: SearchMetrics):
+        """Queue metrics for recording"""
+        if not self.metrics_db.should_record(metrics):
+            return
+        
+        self._queue.put(self.metrics_db.event_row(metrics))
+        self._ensure_thread()
+    
+    def _ensure_thread(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="localseek-metrics", daemon=True
+                )
+                self._thread.start()
+    
+    def _run(self):
+        stopping = False
+        while not stopping:
+            row = self._queue.get()
+            if row is None:
+                break
+            
+            rows = [row]
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    row = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                rows.append(row)
+            
+            try:
+                self.metrics_db.record_rows(rows)
+            except sqlite3.Error:
+                pass  # Metrics are best-effort
+    
+    def close(self, timeout: float = 5.0):
+        """Flush queued metrics and stop the background thread"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
 
 
-# Singleton instance
+# Singleton instances
 _metrics_db: Optional[MetricsDB] = None
+_recorder: Optional[AsyncMetricsRecorder] = None
 
 
 def get_metrics_db() -> MetricsDB:
@@ -343,4 +541,14 @@ def get_metrics_db() -> MetricsDB:
     global _metrics_db
     if _metrics_db is None:
         _metrics_db = MetricsDB()
+        atexit.register(_metrics_db.flush)
     return _metrics_db
+
+
+def get_metrics_recorder() -> AsyncMetricsRecorder:
+    """Get or create the global background metrics recorder"""
+    global _recorder
+    if _recorder is None:
+        _recorder = AsyncMetricsRecorder(get_metrics_db())
+        atexit.register(_recorder.close)
+    return _recorder
@@ -0,0 +1,47 @@
+"""
+Shared SQLite connection for the LLM result caches
+
+ExpansionCache and RerankCache both live in cache.sqlite. They share one
+connection per database file instead of opening one each, so there is a
+single page cache and writes from the rerank thread pool serialize on one
+lock instead of contending for SQLite's file lock.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator
+
+from ..db import apply_pragmas
+
+
+_conns: Dict[str, sqlite3.Connection] = {}
+_lock = threading.RLock()
+
+
+def get_cache_conn(db_path: Path) -> sqlite3.Connection:
+    """Get or open the shared connection for a cache database"""
+    key = str(db_path)
+    with _lock:
+        conn = _conns.get(key)
+        if conn is None:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            # Autocommit mode: writes go through transaction()
+            conn = sqlite3.connect(key, isolation_level=None, check_same_thread=False)
+            apply_pragmas(conn)
+            _conns[key] = conn
+        return conn
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """Run a block of writes as one transaction, serialized across threads"""
+    with _lock:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
@@ -4,18 +4,42 @@ Query expansion module for localseek
 Uses a local LLM to generate alternative phrasings of a query.
 """
 
-import hashlib
+import re
+import sqlite3
 import sys
-from typing import List, Optional, Tuple
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
+from .. import jsonio
 from ..config import get_config
+from ..db import SQL_NOW
+from ..hashing import cache_key
+from .cache_db import get_cache_conn, transaction
 from .llm_client import get_llm_client
 
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ThreadPoolExecutor
+
 
 EXPANSION_PROMPT = """Generate {count} alternative search queries for the given query. 
 Output only the queries, one per line. No numbering, no explanation, no quotes.
 Keep them concise and focused on the same intent."""
 
+# List markers the model adds despite the prompt: "1.", "2)", "3:", "-", "•", "*"
+_PREFIX_RE = re.compile(r"^(?:\d+[.):](?!\d)|[-•*])\s*")
+
+# Constant SQL text, so sqlite3's statement cache reuses the compiled
+# statements across calls
+_GET_EXPANSIONS_SQL = "SELECT expansions FROM expansion_cache WHERE query_hash = ?"
+
+_SET_EXPANSIONS_SQL = f"""
+    INSERT OR REPLACE INTO expansion_cache
+    (query_hash, query, expansions, created_at)
+    VALUES (?, ?, ?, {SQL_NOW})
+"""
+
+_BUMP_HITS_SQL = "UPDATE expansion_cache SET hit_count = hit_count + ? WHERE query_hash = ?"
+
 
 def expand_query(
     query: str,
@@ -38,7 +62,7 @@ def expand_query(
     count = count or config.expand_count
     
     # Check cache first
-    query_hash = hashlib.sha256(query.lower().strip().encode()).hexdigest()
+    query_hash = cache_key(query.lower().strip())
     if cache:
         cached = cache.get(query_hash)
         if cached:
@@ -46,14 +70,14 @@ def expand_query(
     
     # Call LLM
     client = get_llm_client()
-    if not client.is_available():
+    if not client.is_available(probe=False):
         print("Warning: LLM server not available, skipping query expansion", 
               file=sys.stderr)
         return [query], False
     
     response = client.chat(
         messages=[
-            {"role": "system", "content": EXPANSION_PROMPT.format(count=count)},
+            {"role": "system", "content": _expansion_system_prompt(count)},
             {"role": "user", "content": f"Query: {query}"},
         ],
         max_tokens=100,
@@ -63,21 +87,20 @@ def expand_query(
     if not response:
         return [query], False
     
-    # Parse expansions
+    # Parse expansions, skipping repeats of the query or of each other
     expansions = []
-    for line in response.strip().split("\n"):
+    seen = {query.lower()}
+    for line in response.splitlines():
         line = line.strip()
         # Remove common prefixes like "1.", "- ", etc.
-        if line and len(line) > 2:
-            if line[0].isdigit() and line[1] in ".):":
-                line = line[2:].strip()
-            elif line[0] in "-•*":
-                line = line[1:].strip()
-            if line and line.lower() != query.lower():
+        if len(line) > 2:
+            line = _PREFIX_RE.sub("", line, count=1)
+            key = line.lower()
+            if line and key not in seen:
+                seen.add(key)
                 expansions.append(line)
-    
-    # Limit to requested count
-    expansions = expansions[:count]
+                if len(expansions) == count:
+                    break
     
     # Cache the result
     if cache and expansions:
@@ -86,20 +109,49 @@ def expand_query(
     return [query] + expansions, False
 
 
+# Background threads for expand_query_async (created on first use)
+_executor: Optional["ThreadPoolExecutor"] = None
+
+
+def expand_query_async(
+    query: str,
+    count: Optional[int] = None,
+    cache: Optional["ExpansionCache"] = None,
+) -> "Future":
+    """
+    Run expand_query in a background thread
+    
+    Lets the caller search the original query while the LLM is generating
+    expansions; the future resolves to expand_query's (queries, cache_hit).
+    """
+    global _executor
+    if _executor is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="localseek-expand")
+    return _executor.submit(expand_query, query, count, cache)
+
+
+@lru_cache(maxsize=16)
+def _expansion_system_prompt(count: int) -> str:
+    return EXPANSION_PROMPT.format(count=count)
+
+
 class ExpansionCache:
     """Cache for query expansions"""
     
-    def __init__(self, db_path: Optional[str] = None):
-        import sqlite3
+    def __init__(self, db_path: Optional[str] = None, conn: Optional[sqlite3.Connection] = None):
         from pathlib import Path
         
         config = get_config()
         self.db_path = Path(db_path) if db_path else config.cache_db_path
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
-        self.conn = sqlite3.connect(str(self.db_path))
-        self.conn.row_factory = sqlite3.Row
+        # Shared with the other cache on the same file unless one is given
+        self.conn = conn or get_cache_conn(self.db_path)
         self._init_schema()
+        
+        # hit_count bumps are buffered and written in one transaction
+        self._pending_hits: Dict[str, int] = {}
+        self.hit_flush_size = 32
     
     def _init_schema(self):
         self.conn.executescript("""
@@ -114,45 +166,45 @@ class ExpansionCache:
             CREATE INDEX IF NOT EXISTS idx_expansion_created 
             ON expansion_cache(created_at);
         """)
-        self.conn.commit()
     
     def get(self, query_hash: str) -> Optional[List[str]]:
         """Get cached expansions"""
-        import json
-        
-        row = self.conn.execute(
-            "SELECT expansions FROM expansion_cache WHERE query_hash = ?",
-            (query_hash,)
-        ).fetchone()
+        row = self.conn.execute(_GET_EXPANSIONS_SQL, (query_hash,)).fetchone()
         
         if row:
-            # Update hit count
-            self.conn.execute(
-                "UPDATE expansion_cache SET hit_count = hit_count + 1 WHERE query_hash = ?",
-                (query_hash,)
-            )
-            self.conn.commit()
-            return json.loads(row["expansions"])
+            # Update hit count (buffered)
+            self._pending_hits[query_hash] = self._pending_hits.get(query_hash, 0) + 1
+            if sum(self._pending_hits.values()) >= self.hit_flush_size:
+                self.flush_hits()
+            return jsonio.loads(row[0])
         
         return None
     
+    def flush_hits(self):
+        """Write buffered hit_count updates"""
+        if not self._pending_hits:
+            return
+        
+        pending = [(count, query_hash) for query_hash, count in self._pending_hits.items()]
+        self._pending_hits.clear()
+        with transaction(self.conn):
+            self.conn.executemany(_BUMP_HITS_SQL, pending)
+    
     def set(self, query_hash: str, query: str, expansions: List[str]):
         """Cache expansions"""
-        import json
-        from datetime import datetime
-        
-        self.conn.execute(
-            """INSERT OR REPLACE INTO expansion_cache 
-               (query_hash, query, expansions, created_at)
-               VALUES (?, ?, ?, ?)""",
-            (query_hash, query, json.dumps(expansions), datetime.now().isoformat())
-        )
-        self.conn.commit()
+        self.flush_hits()
+        with transaction(self.conn):
+            self.conn.execute(
+                _SET_EXPANSIONS_SQL,
+                (query_hash, query, jsonio.dumps(expansions, indent=False))
+            )
     
     def clear(self):
         """Clear all cached expansions"""
-        self.conn.execute("DELETE FROM expansion_cache")
-        self.conn.commit()
+        self._pending_hits.clear()
+        with transaction(self.conn):
+            self.conn.execute("DELETE FROM expansion_cache")
     
     def close(self):
-        self.conn.close()
+        """Write pending hit counts (the shared connection stays open)"""
+        self.flush_hits()
@@ -0,0 +1,120 @@
+"""
+Keep-alive HTTP connection pool for localseek's optional modules
+
+The LLM client and web search reuse sockets (and TLS sessions) across
+requests through this, using only http.client from the stdlib.
+"""
+
+import http.client
+import threading
+from typing import Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+# (scheme, host, port)
+Origin = Tuple[str, str, Optional[int]]
+
+# A reused keep-alive socket the server already closed fails like this
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+def split_url(url: str) -> Tuple[Origin, str]:
+    """Split a URL into its origin and the path (with query string) to request"""
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    return (parts.scheme or "http", parts.hostname or "localhost", parts.port), path
+
+
+class ConnectionPool:
+    """Idle keep-alive connections per origin; safe to share between threads"""
+
+    def __init__(self, max_idle: int = 16):
+        self.max_idle = max_idle  # per origin
+        self._idle: Dict[Origin, List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, origin: Origin, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        """Take an idle connection (reused=True) or open a new one"""
+        with self._lock:
+            idle = self._idle.get(origin)
+            if idle:
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+
+        scheme, host, port = origin
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout), False
+        return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+    def send(
+        self,
+        method: str,
+        origin: Origin,
+        path: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: float = 10.0,
+    ) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        """
+        Send a request, reusing an idle connection to origin if there is one
+
+        Returns:
+            The connection and its response, with the body still unread;
+            pass both to finish() once the body has been read, or close
+            the connection to abandon the rest
+
+        Raises:
+            OSError or http.client.HTTPException (also for status >= 400)
+        """
+        while True:
+            conn, reused = self._acquire(origin, timeout)
+            try:
+                conn.request(method, path, body=body, headers=dict(headers or {}))
+                response = conn.getresponse()
+            except _STALE_CONNECTION_ERRORS:
+                conn.close()
+                if reused:
+                    continue  # Server dropped the idle socket; retry on a new one
+                raise
+            except BaseException:
+                conn.close()
+                raise
+
+            if response.status >= 400:
+                conn.close()
+                raise http.client.HTTPException(
+                    f"HTTP Error {response.status}: {response.reason}"
+                )
+            return conn, response
+
+    def finish(
+        self,
+        origin: Origin,
+        conn: http.client.HTTPConnection,
+        response: http.client.HTTPResponse,
+    ):
+        """Return a connection whose response was fully read to the pool"""
+        if not response.will_close:
+            with self._lock:
+                idle = self._idle.setdefault(origin, [])
+                if len(idle) < self.max_idle:
+                    idle.append(conn)
+                    return
+        conn.close()
+
+    def close(self):
+        """Close all idle connections"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
@@ -5,13 +5,20 @@ Provides a simple interface to call local LLM servers (Ollama, llama.cpp, etc.)
 Defaults to Ollama API format (http://localhost:11434)
 """
 
+import atexit
+import http.client
 import json
-from typing import List, Dict, Any, Optional
-from urllib.request import Request, urlopen
-from urllib.error import URLError, HTTPError
+import time
+from typing import Iterator, List, Dict, Any, Optional, Tuple
 import sys
 
+from .. import jsonio
 from ..config import get_config
+from .http_pool import ConnectionPool, split_url
+
+
+# Errors that mean "the request failed" (connection, timeout, HTTP status)
+REQUEST_ERRORS = (OSError, http.client.HTTPException)
 
 
 class LLMClient:
@@ -28,19 +35,95 @@ class LLMClient:
         self.timeout = timeout or config.llm_timeout
         self.model = model or config.llm_model
         self._available: Optional[bool] = None
+        self._available_until = 0.0  # monotonic deadline for the cached probe
+        self.available_ttl = 30.0
+        
+        # Parsed once; requests reuse pooled keep-alive connections
+        self._origin, path = split_url(self.base_url)
+        self._path_prefix = path.rstrip("/")
+        self._pool = ConnectionPool(max_idle=16)
+    
+    def _send(
+        self,
+        method: str,
+        path: str,
+        payload: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        """
+        Send a request on a pooled keep-alive connection
+        
+        Returns:
+            The connection and its response, with the body still unread;
+            pass both to _finish() once the body has been read
+        
+        Raises:
+            OSError or http.client.HTTPException (see REQUEST_ERRORS)
+        """
+        body = jsonio.dumpb(payload) if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        return self._pool.send(
+            method, self._origin, self._path_prefix + path, body, headers,
+            timeout or self.timeout,
+        )
+    
+    def _finish(self, conn: http.client.HTTPConnection, response: http.client.HTTPResponse):
+        """Return a connection whose response was fully read to the pool"""
+        self._pool.finish(self._origin, conn, response)
+    
+    def _request(
+        self,
+        method: str,
+        path: str,
+        payload: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> bytes:
+        """
+        Send a request and read the whole response
+        
+        Returns:
+            Response body
+        
+        Raises:
+            OSError or http.client.HTTPException (see REQUEST_ERRORS)
+        """
+        conn, response = self._send(method, path, payload, timeout)
+        try:
+            data = response.read()
+        except BaseException:
+            conn.close()
+            raise
+        self._finish(conn, response)
+        return data
+    
+    def close(self):
+        """Close pooled connections"""
+        self._pool.close()
+    
+    def _remember_available(self, available: bool):
+        self._available = available
+        self._available_until = time.monotonic() + self.available_ttl
     
-    def is_available(self) -> bool:
-        """Check if the LLM server is available"""
-        if self._available is not None:
+    def is_available(self, probe: bool = True) -> bool:
+        """
+        Check if the LLM server is available
+        
+        The answer (from a probe or from the outcome of chat/complete) is
+        cached for available_ttl seconds. With probe=False an unknown state
+        is reported as available without a request, leaving the real
+        request to find out.
+        """
+        if time.monotonic() < self._available_until:
             return self._available
+        if not probe:
+            return True
         
         try:
             # Ollama returns "Ollama is running" at root
-            req = Request(f"{self.base_url}/", method="GET")
-            with urlopen(req, timeout=5) as response:
-                self._available = response.status == 200
-        except (URLError, HTTPError):
-            self._available = False
+            self._request("GET", "/", timeout=5)
+            self._remember_available(True)
+        except REQUEST_ERRORS:
+            self._remember_available(False)
         
         return self._available
     
@@ -61,7 +144,7 @@ class LLMClient:
         Returns:
             Generated text or None if request failed
         """
-        if not self.is_available():
+        if not self.is_available(probe=False):
             return None
         
         payload = {
@@ -75,21 +158,82 @@ class LLMClient:
         }
         
         try:
-            req = Request(
-                f"{self.base_url}/api/chat",
-                data=json.dumps(payload).encode("utf-8"),
-                headers={"Content-Type": "application/json"},
-                method="POST",
-            )
-            
-            with urlopen(req, timeout=self.timeout) as response:
-                result = json.loads(response.read().decode("utf-8"))
-                return result["message"]["content"].strip()
+            result = jsonio.loads(self._request("POST", "/api/chat", payload))
+            self._remember_available(True)
+            return result["message"]["content"].strip()
                 
-        except (URLError, HTTPError, KeyError, json.JSONDecodeError) as e:
+        except ConnectionRefusedError as e:
+            self._remember_available(False)
+            print(f"Warning: LLM chat request failed: {e}", file=sys.stderr)
+            return None
+        except REQUEST_ERRORS as e:
+            self._available_until = 0.0  # Re-probe before the next request
+            print(f"Warning: LLM chat request failed: {e}", file=sys.stderr)
+            return None
+        except (KeyError, json.JSONDecodeError) as e:
             print(f"Warning: LLM chat request failed: {e}", file=sys.stderr)
             return None
     
+    def stream_chat(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 100,
+        temperature: float = 0.7,
+    ) -> Iterator[str]:
+        """
+        Send a streaming chat request, yielding text as it is generated
+        
+        Closing the generator before the response is done drops the
+        connection, which makes the server stop generating. Failures are
+        reported like chat() and end the stream.
+        """
+        if not self.is_available(probe=False):
+            return
+        
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": True,
+            "options": {
+                "num_predict": max_tokens,
+                "temperature": temperature,
+            },
+        }
+        
+        try:
+            conn, response = self._send("POST", "/api/chat", payload)
+        except ConnectionRefusedError as e:
+            self._remember_available(False)
+            print(f"Warning: LLM chat request failed: {e}", file=sys.stderr)
+            return
+        except REQUEST_ERRORS as e:
+            self._available_until = 0.0  # Re-probe before the next request
+            print(f"Warning: LLM chat request failed: {e}", file=sys.stderr)
+            return
+        self._remember_available(True)
+        
+        # One JSON object per line; the last has "done": true
+        done = False
+        try:
+            for line in response:
+                if not line.strip():
+                    continue
+                chunk = jsonio.loads(line)
+                text = chunk.get("message", {}).get("content")
+                if text:
+                    yield text
+                if chunk.get("done"):
+                    response.read()
+                    done = True
+                    break
+        except REQUEST_ERRORS + (json.JSONDecodeError,) as e:
+            print(f"Warning: LLM chat request failed: {e}", file=sys.stderr)
+        finally:
+            if done:
+                self._finish(conn, response)
+            else:
+                conn.close()
+    
     def complete(
         self,
         prompt: str,
@@ -109,7 +253,7 @@ class LLMClient:
         Returns:
             Generated text or None if request failed
         """
-        if not self.is_available():
+        if not self.is_available(probe=False):
             return None
         
         options = {
@@ -127,18 +271,19 @@ class LLMClient:
         }
         
         try:
-            req = Request(
-                f"{self.base_url}/api/generate",
-                data=json.dumps(payload).encode("utf-8"),
-                headers={"Content-Type": "application/json"},
-                method="POST",
-            )
-            
-            with urlopen(req, timeout=self.timeout) as response:
-                result = json.loads(response.read().decode("utf-8"))
-                return result["response"].strip()
+            result = jsonio.loads(self._request("POST", "/api/generate", payload))
+            self._remember_available(True)
+            return result["response"].strip()
                 
-        except (URLError, HTTPError, KeyError, json.JSONDecodeError) as e:
+        except ConnectionRefusedError as e:
+            self._remember_available(False)
+            print(f"Warning: LLM completion request failed: {e}", file=sys.stderr)
+            return None
+        except REQUEST_ERRORS as e:
+            self._available_until = 0.0  # Re-probe before the next request
+            print(f"Warning: LLM completion request failed: {e}", file=sys.stderr)
+            return None
+        except (KeyError, json.JSONDecodeError) as e:
             print(f"Warning: LLM completion request failed: {e}", file=sys.stderr)
             return None
 
@@ -152,4 +297,5 @@ def get_llm_client() -> LLMClient:
     global _client
     if _client is None:
         _client = LLMClient()
+        atexit.register(_client.close)
     return _client
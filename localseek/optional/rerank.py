@@ -4,12 +4,17 @@ Reranking module for localseek
 Uses a local LLM to re-score search results for relevance.
 """
 
-import hashlib
+import re
+import sqlite3
 import sys
-from typing import List, Dict, Any, Optional, Tuple
+from typing import Iterable, List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 
+from .. import jsonio
 from ..config import get_config
+from ..db import SQL_NOW
+from ..hashing import cache_key, content_hash
+from .cache_db import get_cache_conn, transaction
 from .llm_client import get_llm_client
 
 
@@ -20,6 +25,25 @@ RERANK_PROMPT = """Rate the relevance of each document to the query on a scale o
 
 Output only numbers, one per line, in the same order as the documents."""
 
+# The score is the last number on a line: "8", "1. 8", "[1] 8.5", "3: 7/10"
+_SCORE_RE = re.compile(r"(\d+(?:\.\d+)?)(?:\s*/\s*10)?[\s.]*$")
+
+# Constant SQL text, so sqlite3's statement cache reuses the compiled
+# statements across calls
+_GET_SCORE_SQL = "SELECT score FROM rerank_cache WHERE cache_key = ?"
+
+# Keys are passed as one JSON array so any number of lookups is one statement
+_GET_SCORES_SQL = """
+    SELECT doc_hash, score FROM rerank_cache
+    WHERE cache_key IN (SELECT value FROM json_each(?))
+"""
+
+_SET_SCORE_SQL = f"""
+    INSERT OR REPLACE INTO rerank_cache
+    (cache_key, query_hash, doc_hash, score, created_at)
+    VALUES (?, ?, ?, ?, {SQL_NOW})
+"""
+
 
 @dataclass
 class RerankResult:
@@ -56,24 +80,40 @@ def rerank_results(
     config = get_config()
     topk = topk or config.rerank_topk
     
-    # Limit candidates
-    candidates = results[:topk]
+    # Limit candidates, never sending the same document to the LLM twice
+    candidates = []
+    seen = set()
+    for doc in results:
+        key = (doc.get("collection"), doc.get("path"))
+        if key in seen:
+            continue
+        seen.add(key)
+        candidates.append(doc)
+        if len(candidates) >= topk:
+            break
     if not candidates:
         return [], 0
     
     # Get query hash for caching
-    query_hash = hashlib.sha256(query.lower().strip().encode()).hexdigest()
+    query_hash = cache_key(query.lower().strip())
+    
+    # Hash each document once (only needed for the cache); results without
+    # an index hash fall back to hashing the snippet the LLM would see
+    if cache:
+        doc_hashes = [
+            doc.get("hash") or content_hash(doc.get("snippet", "").encode("utf-8"))
+            for doc in candidates
+        ]
     
-    # Check cache for each document
+    # Check cache for all documents at once
+    cached_scores = cache.get_many(query_hash, doc_hashes) if cache else {}
     cache_hits = 0
     scores = {}
     uncached_indices = []
     
-    for i, doc in enumerate(candidates):
-        doc_hash = doc.get("hash", hashlib.md5(doc.get("snippet", "").encode()).hexdigest())
-        
+    for i in range(len(candidates)):
         if cache:
-            cached_score = cache.get(query_hash, doc_hash)
+            cached_score = cached_scores.get(doc_hashes[i])
             if cached_score is not None:
                 scores[i] = cached_score
                 cache_hits += 1
@@ -81,23 +121,23 @@ def rerank_results(
         
         uncached_indices.append(i)
     
-    # Get LLM scores for uncached documents
+    # Get LLM scores for uncached documents; failed chunks keep the
+    # neutral default below and are not cached
     if uncached_indices:
-        llm_scores = _get_llm_scores(query, [candidates[i] for i in uncached_indices])
-        
-        if llm_scores:
-            for idx, score in zip(uncached_indices, llm_scores):
+        new_entries = []
+        for chunk, llm_scores in _score_chunks(query, candidates, uncached_indices, config.rerank_workers):
+            if llm_scores is None:
+                continue
+            
+            for idx, score in zip(chunk, llm_scores):
                 scores[idx] = score
                 
                 # Cache the score
                 if cache:
-                    doc = candidates[idx]
-                    doc_hash = doc.get("hash", hashlib.md5(doc.get("snippet", "").encode()).hexdigest())
-                    cache.set(query_hash, doc_hash, score)
-        else:
-            # LLM failed, use original scores
-            for idx in uncached_indices:
-                scores[idx] = 5.0  # Neutral score
+                    new_entries.append((query_hash, doc_hashes[idx], score))
+        
+        if new_entries:
+            cache.set_many(new_entries)
     
     # Blend scores using position-aware weighting
     reranked = []
@@ -138,22 +178,53 @@ def rerank_results(
     return reranked, cache_hits
 
 
-def _get_llm_scores(query: str, docs: List[Dict[str, Any]]) -> Optional[List[float]]:
-    """Get relevance scores from LLM"""
-    client = get_llm_client()
-    if not client.is_available():
+def _score_chunks(
+    query: str,
+    candidates: List[Dict[str, Any]],
+    indices: List[int],
+    workers: int,
+) -> List[Tuple[List[int], Optional[List[float]]]]:
+    """
+    Score candidates[indices] with up to `workers` concurrent LLM requests
+    
+    Returns:
+        (chunk indices, scores or None if that chunk failed) per chunk
+    """
+    workers = max(1, min(workers, len(indices)))
+    size = -(-len(indices) // workers)
+    chunks = [indices[i:i + size] for i in range(0, len(indices), size)]
+    
+    # A single request finds out availability itself; probe before fanning
+    # several out at a server that may be down
+    if not get_llm_client().is_available(probe=len(chunks) > 1):
         print("Warning: LLM server not available, skipping reranking", 
               file=sys.stderr)
-        return None
+        return []
+    
+    if len(chunks) == 1:
+        return [(chunks[0], _get_llm_scores(query, [candidates[i] for i in chunks[0]]))]
     
-    # Build document list
-    doc_list = ""
-    for i, doc in enumerate(docs, 1):
-        title = doc.get("title", "Untitled")
-        snippet = doc.get("snippet", "")[:200]  # Limit snippet length
-        doc_list += f"\n[{i}] {title}\n{snippet}\n"
+    from concurrent.futures import ThreadPoolExecutor
     
-    response = client.chat(
+    with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+        futures = [
+            executor.submit(_get_llm_scores, query, [candidates[i] for i in chunk])
+            for chunk in chunks
+        ]
+        return [(chunk, future.result()) for chunk, future in zip(chunks, futures)]
+
+
+def _get_llm_scores(query: str, docs: List[Dict[str, Any]]) -> Optional[List[float]]:
+    """Get relevance scores from LLM, or None if it fails or misses any doc"""
+    client = get_llm_client()
+    
+    # Build document list (snippets limited to 200 chars)
+    doc_list = "".join(
+        f"\n[{i}] {doc.get('title', 'Untitled')}\n{doc.get('snippet', '')[:200]}\n"
+        for i, doc in enumerate(docs, 1)
+    )
+    
+    stream = client.stream_chat(
         messages=[
             {"role": "system", "content": RERANK_PROMPT},
             {"role": "user", "content": f"Query: {query}\n\nDocuments:{doc_list}"},
@@ -162,45 +233,55 @@ def _get_llm_scores(query: str, docs: List[Dict[str, Any]]) -> Optional[List[flo
         temperature=0.0,  # Deterministic for consistency
     )
     
-    if not response:
-        return None
-    
-    # Parse scores
+    # Parse scores line by line as they stream in, and stop generation
+    # once every document has one
     scores = []
-    for line in response.strip().split("\n"):
-        line = line.strip()
-        # Extract number from line
-        try:
-            # Handle formats like "1. 8" or "[1] 8" or just "8"
-            parts = line.replace("[", "").replace("]", "").replace(".", " ").split()
-            for part in reversed(parts):
-                score = float(part)
-                if 0 <= score <= 10:
-                    scores.append(score)
-                    break
-        except (ValueError, IndexError):
-            continue
+    received = False
+    pending = ""
+    try:
+        for text in stream:
+            received = True
+            *lines, pending = (pending + text).split("\n")
+            for line in lines:
+                if _add_score(line, scores) and len(scores) == len(docs):
+                    return scores
+    finally:
+        stream.close()
+    
+    if not received:
+        return None
     
-    # If we got fewer scores than documents, pad with neutral
-    while len(scores) < len(docs):
-        scores.append(5.0)
+    if _add_score(pending, scores) and len(scores) == len(docs):
+        return scores
     
-    return scores[:len(docs)]
+    # Scores are positional, so a short answer can't be matched to docs
+    print(f"Warning: reranker returned {len(scores)} scores for {len(docs)} documents",
+          file=sys.stderr)
+    return None
+
+
+def _add_score(line: str, scores: List[float]) -> bool:
+    """Append the score on a response line, if it has a valid one"""
+    match = _SCORE_RE.search(line)
+    if match:
+        score = float(match.group(1))
+        if 0 <= score <= 10:
+            scores.append(score)
+            return True
+    return False
 
 
 class RerankCache:
     """Cache for rerank scores"""
     
-    def __init__(self, db_path: Optional[str] = None):
-        import sqlite3
+    def __init__(self, db_path: Optional[str] = None, conn: Optional[sqlite3.Connection] = None):
         from pathlib import Path
         
         config = get_config()
         self.db_path = Path(db_path) if db_path else config.cache_db_path
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
-        self.conn = sqlite3.connect(str(self.db_path))
-        self.conn.row_factory = sqlite3.Row
+        # Shared with the other cache on the same file unless one is given
+        self.conn = conn or get_cache_conn(self.db_path)
         self._init_schema()
     
     def _init_schema(self):
@@ -218,48 +299,51 @@ class RerankCache:
             CREATE INDEX IF NOT EXISTS idx_rerank_query 
             ON rerank_cache(query_hash);
         """)
-        self.conn.commit()
     
     def _make_key(self, query_hash: str, doc_hash: str) -> str:
-        return hashlib.sha256(f"{query_hash}:{doc_hash}".encode()).hexdigest()
+        return cache_key(f"{query_hash}:{doc_hash}")
     
     def get(self, query_hash: str, doc_hash: str) -> Optional[float]:
         """Get cached rerank score"""
         cache_key = self._make_key(query_hash, doc_hash)
         
-        row = self.conn.execute(
-            "SELECT score FROM rerank_cache WHERE cache_key = ?",
-            (cache_key,)
-        ).fetchone()
+        row = self.conn.execute(_GET_SCORE_SQL, (cache_key,)).fetchone()
         
-        return row["score"] if row else None
+        return row[0] if row else None
+    
+    def get_many(self, query_hash: str, doc_hashes: List[str]) -> Dict[str, float]:
+        """Get cached rerank scores for several documents, keyed by doc_hash"""
+        keys = [self._make_key(query_hash, doc_hash) for doc_hash in doc_hashes]
+        rows = self.conn.execute(_GET_SCORES_SQL, (jsonio.dumps(keys, indent=False),))
+        return {doc_hash: score for doc_hash, score in rows}
     
     def set(self, query_hash: str, doc_hash: str, score: float):
         """Cache rerank score"""
-        from datetime import datetime
-        
-        cache_key = self._make_key(query_hash, doc_hash)
-        
-        self.conn.execute(
-            """INSERT OR REPLACE INTO rerank_cache 
-               (cache_key, query_hash, doc_hash, score, created_at)
-               VALUES (?, ?, ?, ?, ?)""",
-            (cache_key, query_hash, doc_hash, score, datetime.now().isoformat())
-        )
-        self.conn.commit()
+        self.set_many([(query_hash, doc_hash, score)])
+    
+    def set_many(self, items: Iterable[Tuple[str, str, float]]):
+        """Cache (query_hash, doc_hash, score) triples in one transaction"""
+        with transaction(self.conn):
+            self.conn.executemany(
+                _SET_SCORE_SQL,
+                [
+                    (self._make_key(query_hash, doc_hash), query_hash, doc_hash, score)
+                    for query_hash, doc_hash, score in items
+                ]
+            )
     
     def invalidate_doc(self, doc_hash: str):
         """Invalidate all cache entries for a document"""
-        self.conn.execute(
-            "DELETE FROM rerank_cache WHERE doc_hash = ?",
-            (doc_hash,)
-        )
-        self.conn.commit()
+        with transaction(self.conn):
+            self.conn.execute(
+                "DELETE FROM rerank_cache WHERE doc_hash = ?",
+                (doc_hash,)
+            )
     
     def clear(self):
         """Clear all cached scores"""
-        self.conn.execute("DELETE FROM rerank_cache")
-        self.conn.commit()
+        with transaction(self.conn):
+            self.conn.execute("DELETE FROM rerank_cache")
     
     def close(self):
-        self.conn.close()
+        """Nothing is buffered; the shared connection stays open"""
@@ -42,16 +42,15 @@ def summarize_results(
     """
     client = get_llm_client()
     
-    if not client.is_available():
+    if not client.is_available(probe=False):
         return None
     
-    # Format results for the prompt
-    results_text = ""
-    for i, r in enumerate(results[:max_results], 1):
-        title = r.get("title", "Untitled")
-        snippet = r.get("snippet", "")[:300]  # Limit snippet length
-        score = r.get("score", 0)
-        results_text += f"\n{i}. **{title}** (score: {score:.2f})\n   {snippet}\n"
+    # Format results for the prompt (snippets limited to 300 chars)
+    results_text = "".join(
+        f"\n{i}. **{r.get('title', 'Untitled')}** (score: {r.get('score', 0):.2f})\n"
+        f"   {r.get('snippet', '')[:300]}\n"
+        for i, r in enumerate(results[:max_results], 1)
+    )
     
     if not results_text.strip():
         return "No results to summarize."
@@ -88,7 +87,7 @@ def summarize_with_context(
     """
     client = get_llm_client()
     
-    if not client.is_available():
+    if not client.is_available(probe=False):
         return None
     
     # Build context
@@ -99,22 +98,18 @@ def summarize_with_context(
     
     # Local results
     if results:
-        local_text = "\n**Local Documents:**\n"
-        for i, r in enumerate(results[:5], 1):
-            title = r.get("title", "Untitled")
-            snippet = r.get("snippet", "")[:200]
-            local_text += f"{i}. {title}\n   {snippet}\n"
-        context_parts.append(local_text)
+        context_parts.append("\n**Local Documents:**\n" + "".join(
+            f"{i}. {r.get('title', 'Untitled')}\n   {r.get('snippet', '')[:200]}\n"
+            for i, r in enumerate(results[:5], 1)
+        ))
     
     # Web results (if available)
     if web_results:
-        web_text = "\n**Web Results:**\n"
-        for i, r in enumerate(web_results[:3], 1):
-            title = r.get("title", "")
-            snippet = r.get("snippet", "")[:200]
-            url = r.get("url", "")
-            web_text += f"{i}. {title}\n   {snippet}\n   Source: {url}\n"
-        context_parts.append(web_text)
+        context_parts.append("\n**Web Results:**\n" + "".join(
+            f"{i}. {r.get('title', '')}\n   {r.get('snippet', '')[:200]}\n"
+            f"   Source: {r.get('url', '')}\n"
+            for i, r in enumerate(web_results[:3], 1)
+        ))
     
     if not context_parts:
         return "No results to summarize."
@@ -3,14 +3,30 @@ Web search module for localseek
 
 Fetches web results to complement local search.
 Uses DuckDuckGo HTML search (no API key required).
+
+HTML is parsed with selectolax's lexbor engine when it is installed
+(pip install localseek[fast]) and with regexes otherwise.
 """
 
+import atexit
+import http.client
 import re
-import urllib.request
 import urllib.parse
-from typing import List, Dict, Optional
+from typing import TYPE_CHECKING, List, Dict, Mapping, Optional
 from html import unescape
 
+from ..config import get_config
+from ..search_cache import SearchCache
+from .http_pool import ConnectionPool, split_url
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ThreadPoolExecutor
+
 
 # DuckDuckGo HTML search URL
 DDG_URL = "https://html.duckduckgo.com/html/"
@@ -18,6 +34,133 @@ DDG_URL = "https://html.duckduckgo.com/html/"
 # User agent to avoid blocks
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
 
+# Redirect statuses followed by _fetch (urlopen used to do this for us)
+_REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 5
+
+# Most of a page past this is markup we'd throw away; stop reading there
+MAX_RESPONSE_BYTES = 512 * 1024
+
+# DuckDuckGo result markup. Each result has:
+# - <a class="result__a" href="...">title</a>
+# - <a class="result__snippet">snippet</a>
+_LINK_RE = re.compile(
+    r'<a[^>]*class="result__a"[^>]*href="([^"]+)"[^>]*>([^<]+)</a>',
+    re.IGNORECASE | re.DOTALL
+)
+_SNIPPET_RE = re.compile(
+    r'<a[^>]*class="result__snippet"[^>]*>([^<]+(?:<[^>]+>[^<]*</[^>]+>)?[^<]*)</a>',
+    re.IGNORECASE | re.DOTALL
+)
+_RESULT_DIV_RE = re.compile(
+    r'<div[^>]*class="[^"]*result[^"]*"[^>]*>(.*?)</div>\s*</div>',
+    re.IGNORECASE | re.DOTALL
+)
+# Fallback when the markup changes
+_RESULT_DIV_ALT_RE = re.compile(
+    r'<div[^>]*class="result[^"]*"[^>]*>(.*?)<div[^>]*class="result',
+    re.IGNORECASE | re.DOTALL
+)
+
+# Page content extraction
+# A body cut off at MAX_RESPONSE_BYTES has no closing tag
+_BODY_RE = re.compile(r'<body[^>]*>(.*?)(?:</body>|\Z)', re.IGNORECASE | re.DOTALL)
+_BOILERPLATE_RE = re.compile(
+    r'<(script|style|nav|footer|header|aside)[^>]*>.*?</\1>',
+    re.IGNORECASE | re.DOTALL
+)
+_TAG_RE = re.compile(r'<[^>]+>')
+_strip_tags = _TAG_RE.sub
+_BOILERPLATE_TAGS = ["script", "style", "nav", "footer", "header", "aside"]
+
+
+# Shared keep-alive connections (DuckDuckGo and fetched pages)
+_pool: Optional[ConnectionPool] = None
+
+# Background threads for the concurrent helpers (created on first use)
+_executor: Optional["ThreadPoolExecutor"] = None
+
+# Recent DuckDuckGo results, keyed on (query, max_results)
+_results_cache: Optional[SearchCache] = None
+
+
+def _get_pool() -> ConnectionPool:
+    """Get or create the web connection pool"""
+    global _pool
+    if _pool is None:
+        _pool = ConnectionPool(max_idle=4)
+        atexit.register(_pool.close)
+    return _pool
+
+
+def _get_executor() -> "ThreadPoolExecutor":
+    """Get or create the thread pool for concurrent fetches"""
+    global _executor
+    if _executor is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="localseek-web")
+    return _executor
+
+
+def _get_results_cache() -> SearchCache:
+    """Get or create the web search result cache"""
+    global _results_cache
+    if _results_cache is None:
+        _results_cache = SearchCache(maxsize=256, ttl=get_config().web_cache_ttl)
+    return _results_cache
+
+
+def clear_cache():
+    """Drop cached web search results"""
+    if _results_cache is not None:
+        _results_cache.clear()
+
+
+def _fetch(
+    url: str,
+    method: str = "GET",
+    body: Optional[bytes] = None,
+    headers: Optional[Mapping[str, str]] = None,
+    timeout: float = 10,
+    max_bytes: int = MAX_RESPONSE_BYTES,
+) -> bytes:
+    """
+    Fetch a URL over pooled keep-alive connections, following redirects
+    
+    Reads at most max_bytes of the body; a connection with body left
+    unread is closed instead of going back to the pool.
+    
+    Raises:
+        OSError or http.client.HTTPException
+    """
+    pool = _get_pool()
+    headers = {"User-Agent": USER_AGENT, **(headers or {})}
+    
+    for _ in range(MAX_REDIRECTS + 1):
+        origin, path = split_url(url)
+        conn, response = pool.send(method, origin, path, body, headers, timeout)
+        try:
+            data = response.read(max_bytes)
+        except BaseException:
+            conn.close()
+            raise
+        if response.isclosed():
+            pool.finish(origin, conn, response)
+        else:
+            conn.close()
+        
+        location = response.getheader("Location")
+        if response.status not in _REDIRECT_STATUSES or not location:
+            return data
+        
+        url = urllib.parse.urljoin(url, location)
+        if response.status == 303 or (response.status in (301, 302) and method == "POST"):
+            # Like browsers (and urlopen), re-issue as a plain GET
+            method, body = "GET", None
+            headers.pop("Content-Type", None)
+    
+    raise http.client.HTTPException(f"Too many redirects fetching {url}")
+
 
 def fetch_web_results(
     query: str,
@@ -35,117 +178,164 @@ def fetch_web_results(
     Returns:
         List of dicts with title, snippet, url
     """
+    cache = _get_results_cache()
+    key = (query, max_results)
+    cached = cache.get(key)
+    if cached is not None:
+        return [dict(result) for result in cached]
+    
     try:
         # Prepare request
         data = urllib.parse.urlencode({"q": query}).encode("utf-8")
         
-        req = urllib.request.Request(
+        html = _fetch(
             DDG_URL,
-            data=data,
-            headers={
-                "User-Agent": USER_AGENT,
-                "Content-Type": "application/x-www-form-urlencoded",
-            },
             method="POST",
-        )
+            body=data,
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+            timeout=timeout,
+        ).decode("utf-8", errors="ignore")
         
-        with urllib.request.urlopen(req, timeout=timeout) as response:
-            html = response.read().decode("utf-8", errors="ignore")
-        
-        return _parse_ddg_html(html, max_results)
+        results = _parse_ddg_html(html, max_results)
         
     except Exception as e:
         # Fail silently - web search is optional
         import sys
         print(f"Warning: Web search failed: {e}", file=sys.stderr)
         return []
+    
+    # Empty pages are often rate limiting; only cache real answers.
+    # Callers get copies so they can't edit the cached dicts.
+    if results:
+        cache.set(key, results)
+    return [dict(result) for result in results]
+
+
+def fetch_web_results_async(
+    query: str,
+    max_results: int = 5,
+    timeout: int = 10,
+) -> "Future":
+    """
+    Run fetch_web_results in a background thread
+    
+    Lets the caller do local work while the request is in flight; the
+    future resolves to fetch_web_results' list.
+    """
+    return _get_executor().submit(fetch_web_results, query, max_results, timeout)
+
+
+def fetch_web_results_many(
+    queries: List[str],
+    max_results: int = 5,
+    timeout: int = 10,
+) -> List[List[Dict[str, str]]]:
+    """
+    Run several web searches concurrently
+    
+    Returns:
+        One result list per query, in the same order as queries
+    """
+    return list(_get_executor().map(
+        lambda query: fetch_web_results(query, max_results, timeout), queries
+    ))
 
 
 def _parse_ddg_html(html: str, max_results: int) -> List[Dict[str, str]]:
     """Parse DuckDuckGo HTML results"""
+    if LexborHTMLParser is not None:
+        return _parse_ddg_tree(html, max_results)
+    return _parse_ddg_regex(html, max_results)
+
+
+def _parse_ddg_tree(html: str, max_results: int) -> List[Dict[str, str]]:
+    """Parse DuckDuckGo HTML results with selectolax"""
     results = []
     
-    # Find result blocks: <div class="result...">
-    # Each result has:
-    # - <a class="result__a" href="...">title</a>
-    # - <a class="result__snippet">snippet</a>
-    
-    # Pattern for result links
-    link_pattern = re.compile(
-        r'<a[^>]*class="result__a"[^>]*href="([^"]+)"[^>]*>([^<]+)</a>',
-        re.IGNORECASE | re.DOTALL
-    )
-    
-    # Pattern for snippets
-    snippet_pattern = re.compile(
-        r'<a[^>]*class="result__snippet"[^>]*>([^<]+(?:<[^>]+>[^<]*</[^>]+>)?[^<]*)</a>',
-        re.IGNORECASE | re.DOTALL
-    )
+    for node in LexborHTMLParser(html).css("div.result")[:max_results * 2]:
+        if len(results) >= max_results:
+            break
+        
+        link = node.css_first("a.result__a")
+        if link is None:
+            continue
+        
+        snippet_node = node.css_first("a.result__snippet")
+        result = _make_result(
+            link.attributes.get("href") or "",
+            _normalize_text(link.text(separator=" ")),
+            _normalize_text(snippet_node.text(separator=" ")) if snippet_node is not None else "",
+        )
+        if result is not None:
+            results.append(result)
     
-    # Alternative simpler patterns for DDG HTML
-    # Sometimes format changes, so we try multiple approaches
+    return results
+
+
+def _parse_ddg_regex(html: str, max_results: int) -> List[Dict[str, str]]:
+    """Parse DuckDuckGo HTML results with regexes (no selectolax)"""
+    results = []
     
     # Find all result divs
-    result_divs = re.findall(
-        r'<div[^>]*class="[^"]*result[^"]*"[^>]*>(.*?)</div>\s*</div>',
-        html,
-        re.IGNORECASE | re.DOTALL
-    )
+    result_divs = _RESULT_DIV_RE.findall(html)
     
     if not result_divs:
         # Try alternative pattern
-        result_divs = re.findall(
-            r'<div[^>]*class="result[^"]*"[^>]*>(.*?)<div[^>]*class="result',
-            html,
-            re.IGNORECASE | re.DOTALL
-        )
+        result_divs = _RESULT_DIV_ALT_RE.findall(html)
     
     for div in result_divs[:max_results * 2]:  # Get extra in case some fail
         if len(results) >= max_results:
             break
             
         # Extract URL and title
-        link_match = link_pattern.search(div)
+        link_match = _LINK_RE.search(div)
         if not link_match:
             continue
             
-        url = link_match.group(1)
-        title = _clean_html(link_match.group(2))
-        
-        # Skip DuckDuckGo internal links
-        if "duckduckgo.com" in url:
-            continue
-        
-        # Extract actual URL from DDG redirect
-        if "/l/?uddg=" in url:
-            url_match = re.search(r'uddg=([^&]+)', url)
-            if url_match:
-                url = urllib.parse.unquote(url_match.group(1))
-        
         # Extract snippet
-        snippet_match = snippet_pattern.search(div)
+        snippet_match = _SNIPPET_RE.search(div)
         snippet = _clean_html(snippet_match.group(1)) if snippet_match else ""
         
-        if title and url:
-            results.append({
-                "title": title[:200],
-                "snippet": snippet[:300],
-                "url": url,
-                "source": "web",
-            })
+        result = _make_result(link_match.group(1), _clean_html(link_match.group(2)), snippet)
+        if result is not None:
+            results.append(result)
     
     return results[:max_results]
 
 
+def _make_result(url: str, title: str, snippet: str) -> Optional[Dict[str, str]]:
+    """Build a result dict from a parsed DDG link, or None to skip it"""
+    # Skip DuckDuckGo internal links
+    if "duckduckgo.com" in url:
+        return None
+    
+    # Extract actual URL from DDG redirect
+    if "/l/?uddg=" in url:
+        target = url.partition("uddg=")[2].partition("&")[0]
+        if target:
+            url = urllib.parse.unquote(target)
+    
+    if not (title and url):
+        return None
+    
+    return {
+        "title": title[:200],
+        "snippet": snippet[:300],
+        "url": url,
+        "source": "web",
+    }
+
+
 def _clean_html(text: str) -> str:
     """Remove HTML tags and clean text"""
-    # Remove HTML tags
-    text = re.sub(r'<[^>]+>', ' ', text)
-    # Unescape HTML entities
-    text = unescape(text)
-    # Normalize whitespace
-    text = ' '.join(text.split())
-    return text.strip()
+    # Tags to spaces, unescape entities, then normalize whitespace
+    # (split/join already leaves no leading or trailing space)
+    return ' '.join(unescape(_strip_tags(' ', text)).split())
+
+
+def _normalize_text(text: str) -> str:
+    """Collapse whitespace in text already extracted from a parsed tree"""
+    return ' '.join(text.split())
 
 
 def fetch_page_content(url: str, timeout: int = 10, max_chars: int = 5000) -> Optional[str]:
@@ -161,36 +351,54 @@ def fetch_page_content(url: str, timeout: int = 10, max_chars: int = 5000) -> Op
         Extracted text content or None
     """
     try:
-        req = urllib.request.Request(
-            url,
-            headers={"User-Agent": USER_AGENT},
-            method="GET",
-        )
-        
-        with urllib.request.urlopen(req, timeout=timeout) as response:
-            html = response.read().decode("utf-8", errors="ignore")
-        
-        # Extract text from body
-        body_match = re.search(r'<body[^>]*>(.*?)</body>', html, re.IGNORECASE | re.DOTALL)
-        if not body_match:
-            return None
-        
-        body = body_match.group(1)
+        html = _fetch(url, timeout=timeout).decode("utf-8", errors="ignore")
         
-        # Remove scripts, styles, nav, footer
-        for tag in ['script', 'style', 'nav', 'footer', 'header', 'aside']:
-            body = re.sub(rf'<{tag}[^>]*>.*?</{tag}>', '', body, flags=re.IGNORECASE | re.DOTALL)
-        
-        # Extract paragraphs
-        paragraphs = re.findall(r'<p[^>]*>([^<]+(?:<[^>]+>[^<]*</[^>]+>)?[^<]*)</p>', body, re.IGNORECASE)
-        
-        text = ' '.join(_clean_html(p) for p in paragraphs)
-        
-        if len(text) < 100:
-            # Fallback: just clean all HTML
-            text = _clean_html(body)
+        if LexborHTMLParser is not None:
+            text = _extract_text_tree(html)
+        else:
+            text = _extract_text_regex(html)
         
         return text[:max_chars] if text else None
         
     except Exception:
         return None
+
+
+def _extract_text_tree(html: str) -> Optional[str]:
+    """Extract the main text of a page with selectolax"""
+    tree = LexborHTMLParser(html)
+    body = tree.body
+    if body is None:
+        return None
+    
+    # Remove scripts, styles, nav, footer, then take all remaining text
+    tree.strip_tags(_BOILERPLATE_TAGS)
+    return _normalize_text(body.text(separator=' '))
+
+
+def _extract_text_regex(html: str) -> Optional[str]:
+    """Extract the main text of a page with regexes (no selectolax)"""
+    # Extract text from body
+    body_match = _BODY_RE.search(html)
+    if not body_match:
+        return None
+    
+    # Remove scripts, styles, nav, footer (one pass), then clean the
+    # whole body in one sweep
+    return _clean_html(_BOILERPLATE_RE.sub('', body_match.group(1)))
+
+
+def fetch_pages(
+    urls: List[str],
+    timeout: int = 10,
+    max_chars: int = 5000,
+) -> List[Optional[str]]:
+    """
+    Fetch and extract several pages concurrently
+    
+    Returns:
+        fetch_page_content's result for each URL, in the same order as urls
+    """
+    return list(_get_executor().map(
+        lambda url: fetch_page_content(url, timeout, max_chars), urls
+    ))
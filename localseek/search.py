@@ -4,17 +4,128 @@ Search functionality for localseek
 Handles querying the FTS5 index with BM25 ranking.
 """
 
+import os
 import sqlite3
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Pattern
 import re
 
+from .config import get_config
+from .db import apply_pragmas, fetch_dict
 from .index import get_db_path, init_db
+from .search_cache import get_search_cache, make_key
+
+
+# Queries already written in FTS5 syntax: a quote, or an uppercase operator
+# standing alone (so "WORLD" or "ANDROID" don't count)
+_FTS5_SYNTAX_RE = re.compile(r'"|(?:^|[\s(])(?:AND|OR|NOT|NEAR)(?=[\s(]|$)')
+
+# FTS5 special/problematic characters, blanked out of simple queries.
+# * is kept for prefix search intentionally
+_QUERY_CLEAN_TABLE = str.maketrans(dict.fromkeys('^${}[]()\\|:?+-.,;!@#%&=<>\'`~', ' '))
+
+# FTS5 operators that are not terms to highlight in snippets
+_QUERY_OPERATORS = frozenset(('and', 'or', 'not', 'near'))
+
+# FTS5's snippet() counts tokens and returns at most 64; longer snippets
+# are cut from the content in Python
+_SNIPPET_CHARS_PER_TOKEN = 6
+_MAX_SNIPPET_TOKENS = 64
+
+# Searcher never writes; init_db has already created the schema by the
+# time this is set, and the shared PRAGMAs already size mmap and the cache
+_QUERY_ONLY_PRAGMA = "PRAGMA query_only = 1"
+
+_GET_DOCUMENT_SQL = """
+    SELECT d.*, c.name as collection, c.path as collection_path
+    FROM documents d
+    JOIN collections c ON c.id = d.collection_id
+    WHERE d.path = ?
+"""
+_GET_DOCUMENT_IN_COLLECTION_SQL = _GET_DOCUMENT_SQL + " AND c.name = ?"
+
+# Whether ?1 is an indexed file's full path (collection path + separator ?2
+# + document path, as in search results); the document is found through
+# the UNIQUE(collection_id, path) index
+_IS_INDEXED_SQL = """
+    SELECT 1
+    FROM collections c
+    JOIN documents d
+        ON d.collection_id = c.id
+        AND d.path = substr(?1, length(rtrim(c.path, ?2)) + 2)
+    WHERE substr(?1, 1, length(rtrim(c.path, ?2)) + 1) = rtrim(c.path, ?2) || ?2
+    LIMIT 1
+"""
+
+
+@lru_cache(maxsize=None)
+def _search_sql(fts_snippet: bool, by_collection: bool, by_score: bool) -> str:
+    """
+    Build the search query for one combination of options
+    
+    There are only eight, so each string is built once and stays
+    byte-identical, which keeps sqlite3's prepared statement cache hitting.
+    
+    Parameters, in order: snippet tokens (if fts_snippet), FTS query,
+    rank function, collection name (if by_collection), -min_score (if
+    by_score), limit.
+    
+    Columns are SearchResult's fields in order, with the raw text in
+    place of the snippet. Scores are flipped (BM25 returns negative) and
+    full_path is joined here rather than per row in Python.
+    """
+    # Let FTS5 cut the snippet (around the best match in the content
+    # column) so whole documents never cross into Python
+    text_column = "snippet(documents_fts, 1, '', '', '...', ?)" if fts_snippet else "d.content"
+    
+    sql = f"""
+        SELECT 
+            d.path,
+            d.title,
+            {text_column} as text,
+            abs(documents_fts.rank) as score,
+            c.name as collection,
+            rtrim(c.path, '{os.sep}') || '{os.sep}' || d.path as full_path
+        FROM documents_fts
+        JOIN documents d ON d.id = documents_fts.rowid
+        JOIN collections c ON c.id = d.collection_id
+        WHERE documents_fts MATCH ?
+          AND documents_fts.rank MATCH ?
+    """
+    
+    if by_collection:
+        sql += " AND c.name = ?"
+    
+    if by_score:
+        # BM25 returns negative scores, more negative = better match.
+        # rank is the weighted BM25 score, computed once per row
+        sql += " AND documents_fts.rank <= ?"
+    
+    return sql + " ORDER BY documents_fts.rank LIMIT ?"
+
+
+@lru_cache(maxsize=256)
+def _term_pattern(query: str) -> Optional[Pattern[str]]:
+    """
+    Compile one case-insensitive pattern matching any term of query
+    
+    A single search() with it finds the earliest term in one scan of the
+    content, without lowercasing a copy of the document per result.
+    """
+    terms = [t.lower().strip('*"') for t in query.split()
+             if t.lower() not in _QUERY_OPERATORS]
+    if not terms:
+        return None
+    return re.compile('|'.join(map(re.escape, terms)), re.IGNORECASE)
 
 
 class SearchResult:
     """A single search result"""
     
+    __slots__ = ("path", "title", "snippet", "score", "collection", "full_path")
+    
     def __init__(
         self,
         path: str,
@@ -48,9 +159,30 @@ class SearchResult:
 class Searcher:
     """Full-text search using FTS5 BM25"""
     
-    def __init__(self, db_path: Optional[Path] = None):
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        title_weight: Optional[float] = None,
+        content_weight: Optional[float] = None
+    ):
         self.db_path = db_path or get_db_path()
+        
+        # FTS5 ranking function, set per query with "rank MATCH" (default
+        # weights from LOCALSEEK_BM25_TITLE_WEIGHT / _CONTENT_WEIGHT)
+        config = get_config()
+        if title_weight is None:
+            title_weight = config.bm25_title_weight
+        if content_weight is None:
+            content_weight = config.bm25_content_weight
+        self.rank_function = f"bm25({float(title_weight)!r}, {float(content_weight)!r})"
+        
         self.conn = init_db(self.db_path)
+        self.conn.execute(_QUERY_ONLY_PRAGMA)
+        
+        # Extra connections for search_many() worker threads
+        self._pool: List[sqlite3.Connection] = []
+        self._all_pooled: List[sqlite3.Connection] = []
+        self._pool_lock = threading.Lock()
     
     def search(
         self,
@@ -73,71 +205,131 @@ class Searcher:
         Returns:
             List of SearchResult objects sorted by relevance
         """
+        return self._search(
+            self.conn, query, collection, limit, min_score, snippet_length
+        )
+    
+    def search_many(
+        self,
+        queries: List[str],
+        collection: Optional[str] = None,
+        limit: int = 10,
+        min_score: float = 0.0,
+        snippet_length: int = 150
+    ) -> List[List[SearchResult]]:
+        """
+        Run several searches concurrently
+        
+        Each query runs on its own pooled connection; sqlite3 releases the
+        GIL while SQLite executes, so the FTS5 lookups overlap.
+        
+        Returns:
+            One result list per query, in the same order as queries
+        """
+        if len(queries) <= 1:
+            return [
+                self.search(q, collection, limit, min_score, snippet_length)
+                for q in queries
+            ]
+        
+        from concurrent.futures import ThreadPoolExecutor
+        
+        def run(query: str) -> List[SearchResult]:
+            conn = self._acquire_conn()
+            try:
+                return self._search(
+                    conn, query, collection, limit, min_score, snippet_length
+                )
+            finally:
+                self._release_conn(conn)
+        
+        with ThreadPoolExecutor(max_workers=min(len(queries), 8)) as executor:
+            return list(executor.map(run, queries))
+    
+    def _acquire_conn(self) -> sqlite3.Connection:
+        """Take a connection from the worker pool, opening one if needed"""
+        with self._pool_lock:
+            if self._pool:
+                return self._pool.pop()
+        
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        apply_pragmas(conn)
+        conn.execute(_QUERY_ONLY_PRAGMA)
+        with self._pool_lock:
+            self._all_pooled.append(conn)
+        return conn
+    
+    def _release_conn(self, conn: sqlite3.Connection):
+        with self._pool_lock:
+            self._pool.append(conn)
+    
+    def _search(
+        self,
+        conn: sqlite3.Connection,
+        query: str,
+        collection: Optional[str],
+        limit: int,
+        min_score: float,
+        snippet_length: int
+    ) -> List[SearchResult]:
+        cache = get_search_cache()
+        cache_key = make_key(
+            str(self.db_path), query, collection, limit, min_score, snippet_length,
+            self.rank_function
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         # Clean and prepare query
         fts_query = self._prepare_query(query)
         
         if not fts_query.strip():
             return []
         
-        # Build SQL
-        sql = """
-            SELECT 
-                d.id,
-                d.path,
-                d.title,
-                d.content,
-                c.name as collection,
-                c.path as collection_path,
-                bm25(documents_fts) as score
-            FROM documents_fts
-            JOIN documents d ON d.id = documents_fts.rowid
-            JOIN collections c ON c.id = d.collection_id
-            WHERE documents_fts MATCH ?
-        """
-        params: List[Any] = [fts_query]
+        snippet_tokens = -(-snippet_length // _SNIPPET_CHARS_PER_TOKEN)
+        fts_snippet = snippet_tokens <= _MAX_SNIPPET_TOKENS
+        sql = _search_sql(fts_snippet, bool(collection), min_score > 0)
         
+        params: List[Any] = []
+        if fts_snippet:
+            params.append(snippet_tokens)
+        params.append(fts_query)
+        params.append(self.rank_function)
         if collection:
-            sql += " AND c.name = ?"
             params.append(collection)
-        
         if min_score > 0:
-            # BM25 returns negative scores, more negative = better match
-            sql += " AND bm25(documents_fts) <= ?"
             params.append(-min_score)
-        
-        sql += " ORDER BY score LIMIT ?"
         params.append(limit)
         
         try:
-            rows = self.conn.execute(sql, params).fetchall()
+            cursor = conn.execute(sql, params)
+            cursor.row_factory = None
+            rows = cursor.fetchall()
         except sqlite3.OperationalError as e:
             if "no such table" in str(e):
                 return []
             raise
         
-        results = []
-        for row in rows:
-            # Generate snippet with query highlighting
-            snippet = self._generate_snippet(
-                row["content"], 
-                query, 
-                snippet_length
-            )
-            
-            # Normalize score (BM25 returns negative, flip it)
-            normalized_score = abs(row["score"])
-            
-            full_path = str(Path(row["collection_path"]) / row["path"])
-            
-            results.append(SearchResult(
-                path=row["path"],
-                title=row["title"],
-                snippet=snippet,
-                score=normalized_score,
-                collection=row["collection"],
-                full_path=full_path
-            ))
+        if fts_snippet:
+            results = [
+                SearchResult(path, title, ' '.join(text.split()), score, collection, full_path)
+                for path, title, text, score, collection, full_path in rows
+            ]
+        else:
+            # Generate snippet with query highlighting; the term pattern is
+            # looked up once for all rows
+            pattern = _term_pattern(query)
+            results = [
+                SearchResult(
+                    path, title, self._generate_snippet(text, pattern, snippet_length),
+                    score, collection, full_path
+                )
+                for path, title, text, score, collection, full_path in rows
+            ]
         
+        cache.set(cache_key, results)
         return results
     
     def _prepare_query(self, query: str) -> str:
@@ -151,44 +343,30 @@ class Searcher:
         - Prefix: "think*" → think*
         """
         # If already contains FTS5 operators, use as-is (advanced user)
-        if any(op in query for op in ['"', 'OR', 'AND', 'NOT', 'NEAR']):
+        if _FTS5_SYNTAX_RE.search(query):
             return query
         
-        # Escape FTS5 special/problematic characters for simple queries
-        # These can cause syntax errors in FTS5
-        # We keep * for prefix search intentionally
-        special_chars = '^${}[]()\\|:?+-.,;!@#%&=<>\'`~'
-        cleaned = query
-        for char in special_chars:
-            cleaned = cleaned.replace(char, ' ')
-        
-        # Collapse multiple spaces
-        cleaned = ' '.join(cleaned.split())
-        
-        return cleaned.strip()
+        # Blank out characters that cause FTS5 syntax errors, then
+        # collapse multiple spaces
+        return ' '.join(query.translate(_QUERY_CLEAN_TABLE).split())
     
     def _generate_snippet(
         self, 
         content: str, 
-        query: str, 
+        pattern: Optional[Pattern[str]], 
         max_length: int
     ) -> str:
-        """Generate a snippet with query terms highlighted"""
-        # Get query terms (simple tokenization)
-        terms = [t.lower().strip('*"') for t in query.split() 
-                 if t.lower() not in ('and', 'or', 'not', 'near')]
+        """
+        Generate a snippet with query terms highlighted
         
-        if not terms:
+        pattern is the query's _term_pattern(), None if it has no terms.
+        """
+        if pattern is None:
             return content[:max_length] + "..." if len(content) > max_length else content
         
         # Find best position (first occurrence of any term)
-        content_lower = content.lower()
-        best_pos = len(content)
-        
-        for term in terms:
-            pos = content_lower.find(term)
-            if 0 <= pos < best_pos:
-                best_pos = pos
+        match = pattern.search(content)
+        best_pos = match.start() if match else len(content)
         
         # Extract snippet around best position
         start = max(0, best_pos - max_length // 3)
@@ -200,38 +378,24 @@ class Searcher:
             if space_pos > start - 20:
                 start = space_pos + 1
         
-        snippet = content[start:end]
-        
-        # Add ellipsis
-        if start > 0:
-            snippet = "..." + snippet
+        # Slice once, add ellipses, and join everything in one go
+        parts = ["..."] if start > 0 else []
+        parts.append(content[start:end])
         if end < len(content):
-            snippet = snippet + "..."
+            parts.append("...")
         
         # Clean up whitespace
-        snippet = ' '.join(snippet.split())
-        
-        return snippet
+        return ' '.join(''.join(parts).split())
     
     def get_document(self, path: str, collection: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Get a document by path"""
-        sql = """
-            SELECT d.*, c.name as collection, c.path as collection_path
-            FROM documents d
-            JOIN collections c ON c.id = d.collection_id
-            WHERE d.path = ?
-        """
-        params: List[Any] = [path]
-        
         if collection:
-            sql += " AND c.name = ?"
-            params.append(collection)
-        
-        row = self.conn.execute(sql, params).fetchone()
-        
-        if row:
-            return dict(row)
-        return None
+            return fetch_dict(self.conn, _GET_DOCUMENT_IN_COLLECTION_SQL, (path, collection))
+        return fetch_dict(self.conn, _GET_DOCUMENT_SQL, (path,))
+    
+    def is_indexed(self, full_path: str) -> bool:
+        """Whether full_path (as in SearchResult.full_path) is an indexed document"""
+        return self.conn.execute(_IS_INDEXED_SQL, (full_path, os.sep)).fetchone() is not None
     
     def autocomplete(self, prefix: str, limit: int = 8) -> List[Dict[str, str]]:
         """
@@ -267,5 +431,10 @@ class Searcher:
             return []
     
     def close(self):
-        """Close database connection"""
+        """Close database connections"""
+        with self._pool_lock:
+            for conn in self._all_pooled:
+                conn.close()
+            self._pool.clear()
+            self._all_pooled.clear()
         self.conn.close()
@@ -0,0 +1,93 @@
+"""
+Search result cache for localseek
+
+Keeps recent search results in memory so repeated identical queries
+(iterative CLI use, the web UI) skip the FTS5 lookup entirely.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Tuple
+
+from .config import get_config
+
+
+class SearchCache:
+    """In-memory LRU cache with a per-entry TTL"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Tuple[Any, ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key: Hashable) -> Optional[List[Any]]:
+        """Get cached results, or None if missing or expired"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, results = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return list(results)
+
+    def set(self, key: Hashable, results: List[Any]):
+        """Cache results, evicting the least recently used entry if full"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, tuple(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached results (call after the index changes)"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def make_key(
+    db_path: str,
+    query: str,
+    collection: Optional[str],
+    limit: int,
+    min_score: float,
+    snippet_length: int,
+    rank_function: str,
+) -> Tuple:
+    """Build the cache key for a search call (a plain tuple, hashed in C)"""
+    return (db_path, query, collection, limit, min_score, snippet_length, rank_function)
+
+
+# Singleton instance
+_search_cache: Optional[SearchCache] = None
+
+
+def get_search_cache() -> SearchCache:
+    """Get or create the global search result cache"""
+    global _search_cache
+    if _search_cache is None:
+        config = get_config()
+        _search_cache = SearchCache(
+            maxsize=config.search_cache_size,
+            ttl=config.search_cache_ttl,
+        )
+    return _search_cache
@@ -8,455 +8,214 @@ Usage:
     python -m localseek.web [--port 8080]
 """
 
-import json
+import atexit
+import gzip
 import os
+import queue
+import shutil
 import subprocess
 import sys
+import threading
 import urllib.parse
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, List, Optional, Tuple
 
+from .. import jsonio
+from ..config import get_config
+from ..hashing import content_hash
 from ..search import Searcher
+from ..search_cache import SearchCache
 from ..index import Indexer
 
 
-# HTML template with embedded CSS and JS
-HTML_TEMPLATE = """<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>localseek</title>
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Libre+Baskerville:wght@400;700&family=IBM+Plex+Sans:wght@300;400;500;600&display=swap');
-        * { box-sizing: border-box; }
-        body {
-            font-family: 'IBM Plex Sans', 'Segoe UI', system-ui, sans-serif;
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 20px;
-            background: #faf6f0;
-            color: #3d2b1f;
-        }
-        h1 { 
-            font-family: 'Libre Baskerville', Georgia, serif;
-            color: #3d2b1f;
-            font-weight: 400;
-            margin-bottom: 5px;
-        }
-        .subtitle {
-            color: #8b7560;
-            margin-top: 0;
-            margin-bottom: 20px;
-        }
-        .search-box {
-            display: flex;
-            gap: 10px;
-            margin-bottom: 20px;
-        }
-        input[type="text"] {
-            flex: 1;
-            padding: 12px 16px;
-            font-size: 16px;
-            border: 2px solid #ede4d5;
-            border-radius: 8px;
-            outline: none;
-            background: #ffffff;
-            color: #3d2b1f;
-        }
-        input[type="text"]:focus {
-            border-color: #c4a67d;
-        }
-        button {
-            padding: 12px 24px;
-            font-size: 16px;
-            background: #1a5c4c;
-            color: white;
-            border: none;
-            border-radius: 8px;
-            cursor: pointer;
-        }
-        button:hover {
-            background: #2d7a64;
-        }
-        .options {
-            display: flex;
-            gap: 15px;
-            margin-bottom: 20px;
-            flex-wrap: wrap;
-        }
-        .options label {
-            display: flex;
-            align-items: center;
-            gap: 5px;
-            color: #6b5443;
-        }
-        .results {
-            background: white;
-            border-radius: 8px;
-            border: 1px solid #ede4d5;
-            box-shadow: 0 1px 3px rgba(61,43,31,0.06);
-        }
-        .result {
-            padding: 15px 20px;
-            border-bottom: 1px solid #ede4d5;
-        }
-        .result:last-child {
-            border-bottom: none;
-        }
-        .result-title {
-            font-size: 18px;
-            margin: 0 0 5px 0;
-        }
-        .result-title a {
-            color: #c2452d;
-            text-decoration: none;
-        }
-        .result-title a:hover {
-            text-decoration: underline;
-        }
-        .result-meta {
-            font-size: 13px;
-            color: #8b7560;
-            margin-bottom: 5px;
-        }
-        .result-snippet {
-            font-size: 14px;
-            color: #6b5443;
-            line-height: 1.5;
-        }
-        .score {
-            background: #ede4d5;
-            padding: 2px 6px;
-            border-radius: 4px;
-            font-size: 12px;
-            color: #6b5443;
-        }
-        .no-results {
-            padding: 40px;
-            text-align: center;
-            color: #8b7560;
-        }
-        .loading {
-            padding: 40px;
-            text-align: center;
-            color: #8b7560;
-        }
-        .summary {
-            background: #ffffff;
-            border: 1px solid #ede4d5;
-            border-left: 3px solid #1a5c4c;
-            border-radius: 8px;
-            padding: 15px 20px;
-            margin-bottom: 20px;
-        }
-        .summary h3 {
-            margin: 0 0 10px 0;
-            color: #1a5c4c;
-            font-family: 'Libre Baskerville', Georgia, serif;
-            font-weight: 400;
-        }
-        .web-results {
-            margin-top: 20px;
-        }
-        .web-results h3 {
-            color: #3d2b1f;
-            font-family: 'Libre Baskerville', Georgia, serif;
-            font-weight: 400;
-            margin-bottom: 10px;
-        }
-        .web-result {
-            padding: 10px 15px;
-            background: #fff;
-            border-radius: 6px;
-            margin-bottom: 8px;
-            border: 1px solid #ede4d5;
-            box-shadow: 0 1px 2px rgba(61,43,31,0.04);
-        }
-        .web-result a {
-            color: #c2452d;
-            text-decoration: none;
-        }
-        .web-result a:hover {
-            text-decoration: underline;
-        }
-        .stats {
-            font-size: 13px;
-            color: #8b7560;
-            margin-bottom: 15px;
-        }
-        .search-container {
-            position: relative;
-            flex: 1;
-        }
-        .autocomplete {
-            position: absolute;
-            top: 100%;
-            left: 0;
-            right: 0;
-            background: white;
-            border: 2px solid #ede4d5;
-            border-top: none;
-            border-radius: 0 0 8px 8px;
-            max-height: 300px;
-            overflow-y: auto;
-            z-index: 100;
-            display: none;
-        }
-        .autocomplete.show {
-            display: block;
-        }
-        .autocomplete-item {
-            padding: 10px 16px;
-            cursor: pointer;
-            border-bottom: 1px solid #ede4d5;
-        }
-        .autocomplete-item:last-child {
-            border-bottom: none;
-        }
-        .autocomplete-item:hover, .autocomplete-item.selected {
-            background: rgba(194,69,45,0.06);
-        }
-        .autocomplete-item .title {
-            font-weight: 500;
-            color: #3d2b1f;
-        }
-        .autocomplete-item .collection {
-            font-size: 12px;
-            color: #8b7560;
-        }
-    </style>
-</head>
-<body>
-    <h1>localseek</h1>
-    <p class="subtitle">Search your local documents</p>
+# The page (HTML with embedded CSS and JS) ships as package data
+_HTML_PATH = Path(__file__).parent / "static" / "index.html"
+
+# The page never changes while the server runs: read, compress, measure
+# and tag it once. Browsers revalidate with If-None-Match and get a 304
+# (a weak tag, since the gzip and plain bodies share it)
+_HTML_BYTES = _HTML_PATH.read_bytes()
+_HTML_LENGTH = str(len(_HTML_BYTES))
+_HTML_GZIP = gzip.compress(_HTML_BYTES, compresslevel=9)
+_HTML_GZIP_LENGTH = str(len(_HTML_GZIP))
+_HTML_ETAG = f'W/"{content_hash(_HTML_BYTES)}"'
+
+# JSON responses at least this big are gzipped for clients that accept it
+GZIP_MIN_BYTES = 1024
+
+# Searchers reused across requests. Each request borrows an idle one (or
+# opens another if all are busy), so no two threads share a connection
+_idle_searchers: "queue.SimpleQueue[Searcher]" = queue.SimpleQueue()
+_searchers: List[Searcher] = []
+_searchers_lock = threading.Lock()
+
+# Indexer for /api/status, created on first use
+_indexer: Optional[Indexer] = None
+_indexer_lock = threading.Lock()
+
+# Encoded JSON for recent searches and autocomplete prefixes, so repeats
+# skip search, LLM calls and serialization (LOCALSEEK_SEARCH_CACHE_TTL)
+_response_cache: Optional[SearchCache] = None
+
+# Browsers may reuse an autocomplete answer this long (seconds)
+AUTOCOMPLETE_MAX_AGE = 60
+
+# Suggestion lists per (normalized prefix, limit). A list shorter than its
+# limit holds every matching title, so prefixes typed after it are
+# answered by filtering it instead of querying
+_suggestions_cache: Optional[SearchCache] = None
+
+
+def _get_response_cache() -> SearchCache:
+    """Get or create the web response cache"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = SearchCache(maxsize=512, ttl=get_config().search_cache_ttl)
+    return _response_cache
+
+
+def _autocomplete(prefix: str, limit: int) -> List[dict]:
+    """Searcher.autocomplete, narrowing a cached shorter prefix when possible"""
+    global _suggestions_cache
+    if _suggestions_cache is None:
+        _suggestions_cache = SearchCache(maxsize=1024, ttl=get_config().search_cache_ttl)
+    cache = _suggestions_cache
     
-    <div class="search-box">
-        <div class="search-container">
-            <input type="text" id="query" placeholder="Enter search query..." autocomplete="off" autofocus>
-            <div id="autocomplete" class="autocomplete"></div>
-        </div>
-        <button onclick="search()">Search</button>
-    </div>
+    # Same normalization as Searcher.autocomplete
+    key = prefix.strip().lower()
+    suggestions = cache.get((key, limit))
+    if suggestions is not None:
+        return suggestions
     
-    <div class="options">
-        <label><input type="checkbox" id="expand"> Expand query</label>
-        <label><input type="checkbox" id="rerank"> Rerank results</label>
-        <label><input type="checkbox" id="fetch"> Include web</label>
-        <label><input type="checkbox" id="summarize"> Summarize</label>
-    </div>
+    # Python's substring test equals SQLite's LOWER() LIKE '%key%' only for
+    # ASCII keys without LIKE wildcards
+    if key.isascii() and "%" not in key and "_" not in key:
+        for end in range(len(key) - 1, 1, -1):
+            shorter = cache.get((key[:end], limit))
+            if shorter is not None and len(shorter) < limit:
+                suggestions = [s for s in shorter if key in s["title"].lower()]
+                break
     
-    <div id="stats" class="stats"></div>
-    <div id="summary"></div>
-    <div id="results" class="results"></div>
-    <div id="web-results" class="web-results"></div>
+    if suggestions is None:
+        with _borrow_searcher() as searcher:
+            suggestions = searcher.autocomplete(prefix, limit=limit)
     
-    <script>
-        const queryInput = document.getElementById('query');
-        const autocompleteDiv = document.getElementById('autocomplete');
-        let autocompleteTimeout = null;
-        let selectedIndex = -1;
-        
-        queryInput.addEventListener('keypress', (e) => {
-            if (e.key === 'Enter') {
-                hideAutocomplete();
-                search();
-            }
-        });
-        
-        queryInput.addEventListener('input', () => {
-            clearTimeout(autocompleteTimeout);
-            autocompleteTimeout = setTimeout(fetchAutocomplete, 150);
-        });
-        
-        queryInput.addEventListener('keydown', (e) => {
-            const items = autocompleteDiv.querySelectorAll('.autocomplete-item');
-            if (items.length === 0) return;
-            
-            if (e.key === 'ArrowDown') {
-                e.preventDefault();
-                selectedIndex = Math.min(selectedIndex + 1, items.length - 1);
-                updateSelection(items);
-            } else if (e.key === 'ArrowUp') {
-                e.preventDefault();
-                selectedIndex = Math.max(selectedIndex - 1, -1);
-                updateSelection(items);
-            } else if (e.key === 'Escape') {
-                hideAutocomplete();
-            }
-        });
-        
-        document.addEventListener('click', (e) => {
-            if (!e.target.closest('.search-container')) {
-                hideAutocomplete();
-            }
-        });
-        
-        function updateSelection(items) {
-            items.forEach((item, i) => {
-                item.classList.toggle('selected', i === selectedIndex);
-            });
-            if (selectedIndex >= 0) {
-                queryInput.value = items[selectedIndex].dataset.title;
-            }
-        }
-        
-        function hideAutocomplete() {
-            autocompleteDiv.classList.remove('show');
-            selectedIndex = -1;
-        }
-        
-        async function fetchAutocomplete() {
-            const prefix = queryInput.value.trim();
-            if (prefix.length < 2) {
-                hideAutocomplete();
-                return;
-            }
-            
-            try {
-                const response = await fetch('/api/autocomplete?prefix=' + encodeURIComponent(prefix));
-                const data = await response.json();
-                
-                if (data.suggestions && data.suggestions.length > 0) {
-                    autocompleteDiv.innerHTML = data.suggestions.map(s => `
-                        <div class="autocomplete-item" data-title="${escapeHtml(s.title)}">
-                            <div class="title">${escapeHtml(s.title)}</div>
-                            <div class="collection">${escapeHtml(s.collection)}</div>
-                        </div>
-                    `).join('');
-                    
-                    autocompleteDiv.querySelectorAll('.autocomplete-item').forEach(item => {
-                        item.addEventListener('click', () => {
-                            queryInput.value = item.dataset.title;
-                            hideAutocomplete();
-                            search();
-                        });
-                    });
-                    
-                    autocompleteDiv.classList.add('show');
-                    selectedIndex = -1;
-                } else {
-                    hideAutocomplete();
-                }
-            } catch (err) {
-                hideAutocomplete();
-            }
-        }
-        
-        async function search() {
-            const query = queryInput.value.trim();
-            if (!query) return;
-            
-            const resultsDiv = document.getElementById('results');
-            const summaryDiv = document.getElementById('summary');
-            const webResultsDiv = document.getElementById('web-results');
-            const statsDiv = document.getElementById('stats');
-            
-            resultsDiv.innerHTML = '<div class="loading">Searching...</div>';
-            summaryDiv.innerHTML = '';
-            webResultsDiv.innerHTML = '';
-            statsDiv.innerHTML = '';
-            
-            const params = new URLSearchParams({
-                q: query,
-                expand: document.getElementById('expand').checked,
-                rerank: document.getElementById('rerank').checked,
-                fetch: document.getElementById('fetch').checked,
-                summarize: document.getElementById('summarize').checked
-            });
-            
-            try {
-                const startTime = Date.now();
-                const response = await fetch('/api/search?' + params);
-                const data = await response.json();
-                const elapsed = Date.now() - startTime;
-                
-                // Stats
-                statsDiv.innerHTML = `Found ${data.count} results in ${elapsed}ms`;
-                if (data.expanded_queries && data.expanded_queries.length > 1) {
-                    statsDiv.innerHTML += ` | Expanded to: ${data.expanded_queries.join(', ')}`;
-                }
-                
-                // Summary
-                if (data.summary) {
-                    summaryDiv.innerHTML = `
-                        <div class="summary">
-                            <h3>Summary</h3>
-                            <p>${data.summary}</p>
-                        </div>
-                    `;
-                }
-                
-                // Local results
-                if (data.results && data.results.length > 0) {
-                    resultsDiv.innerHTML = data.results.map(r => `
-                        <div class="result">
-                            <h3 class="result-title">
-                                <a href="#" class="file-link" data-path="${encodeURIComponent(r.full_path)}">${escapeHtml(r.title)}</a>
-                            </h3>
-                            <div class="result-meta">
-                                <span class="score">${r.blended_score ? r.blended_score.toFixed(3) : r.score.toFixed(3)}</span>
-                                ${r.collection}/${r.path}
-                            </div>
-                            <div class="result-snippet">${escapeHtml(r.snippet)}</div>
-                        </div>
-                    `).join('');
-                    
-                    // Attach click handlers to file links
-                    document.querySelectorAll('.file-link').forEach(link => {
-                        link.addEventListener('click', (e) => {
-                            e.preventDefault();
-                            openFile(decodeURIComponent(link.dataset.path));
-                        });
-                    });
-                } else {
-                    resultsDiv.innerHTML = '<div class="no-results">No results found</div>';
-                }
-                
-                // Web results
-                if (data.web_results && data.web_results.length > 0) {
-                    webResultsDiv.innerHTML = `
-                        <h3>Web Results</h3>
-                        ${data.web_results.map(r => `
-                            <div class="web-result">
-                                <a href="${r.url}" target="_blank">${escapeHtml(r.title)}</a>
-                            </div>
-                        `).join('')}
-                    `;
-                }
-                
-            } catch (err) {
-                resultsDiv.innerHTML = `<div class="no-results">Error: ${err.message}</div>`;
-            }
-        }
-        
-        function escapeHtml(text) {
-            const div = document.createElement('div');
-            div.textContent = text || '';
-            return div.innerHTML;
-        }
-        
-        async function openFile(path) {
-            try {
-                const response = await fetch('/api/open?path=' + encodeURIComponent(path));
-                const data = await response.json();
-                if (!data.success) {
-                    alert('Failed to open file: ' + (data.error || 'Unknown error'));
-                }
-            } catch (err) {
-                alert('Failed to open file: ' + err.message);
-            }
-        }
-    </script>
-</body>
-</html>
-"""
+    cache.set((key, limit), suggestions)
+    return suggestions
+
+
+# Optional features, imported once by _resolve_optionals() (None when the
+# module or its dependencies are unavailable)
+_optionals_resolved = False
+_fetch_web_results_async = None
+_expand_query_async = None
+_ExpansionCache = None
+_rerank_results = None
+_RerankCache = None
+_summarize_with_context = None
+
+
+def _resolve_optionals():
+    """Import the optional feature modules (at server startup, not per request)"""
+    global _optionals_resolved, _fetch_web_results_async, _expand_query_async
+    global _ExpansionCache, _rerank_results, _RerankCache, _summarize_with_context
+    if _optionals_resolved:
+        return
+    
+    try:
+        from ..optional.web_search import fetch_web_results_async
+        _fetch_web_results_async = fetch_web_results_async
+    except ImportError:
+        pass
+    try:
+        from ..optional.expand import expand_query_async, ExpansionCache
+        _expand_query_async, _ExpansionCache = expand_query_async, ExpansionCache
+    except ImportError:
+        pass
+    try:
+        from ..optional.rerank import rerank_results, RerankCache
+        _rerank_results, _RerankCache = rerank_results, RerankCache
+    except ImportError:
+        pass
+    try:
+        from ..optional.summarize import summarize_with_context
+        _summarize_with_context = summarize_with_context
+    except ImportError:
+        pass
+    _optionals_resolved = True
+
+
+@contextmanager
+def _borrow_searcher() -> Iterator[Searcher]:
+    """Borrow a Searcher for the duration of one request"""
+    try:
+        searcher = _idle_searchers.get_nowait()
+    except queue.Empty:
+        searcher = Searcher()
+        with _searchers_lock:
+            if not _searchers:
+                atexit.register(_close_searchers)
+            _searchers.append(searcher)
+    try:
+        yield searcher
+    finally:
+        _idle_searchers.put(searcher)
+
+
+def _close_searchers():
+    """Close every Searcher opened by the web UI"""
+    with _searchers_lock:
+        for searcher in _searchers:
+            searcher.close()
+        _searchers.clear()
+
+
+# Files /api/open has confirmed are indexed (added to, never pruned: a
+# file removed from the index since was still one the user indexed)
+_openable_paths = set()
+
+# Opened in VS Code when it is installed; anything else goes to the
+# system's default application
+TEXT_EXTENSIONS = frozenset({
+    '.md', '.txt', '.rst', '.json', '.yaml', '.yml', '.py', '.js', '.ts', '.html', '.css',
+})
+
+# VS Code's command line launcher (code.cmd on Windows), None if not installed
+_VSCODE = shutil.which("code")
+
+
+def _get_indexer() -> Indexer:
+    """Get or create the shared Indexer (call with _indexer_lock held)"""
+    global _indexer
+    if _indexer is None:
+        _indexer = Indexer()
+        atexit.register(_indexer.close)
+    return _indexer
 
 
 class LocalseekHandler(BaseHTTPRequestHandler):
     """HTTP request handler for localseek web UI"""
     
+    # Keep-alive: autocomplete keystrokes and file opens reuse the browser's
+    # connection. Every response must therefore send Content-Length
+    protocol_version = "HTTP/1.1"
+    
+    # Close idle keep-alive connections after this many seconds, so they
+    # don't hold one of the server's request threads indefinitely
+    timeout = 15
+    
+    def handle(self):
+        # Clients drop connections mid-response (an aborted autocomplete
+        # fetch, a closed tab); there's nothing left to send and no need
+        # for socketserver to print a traceback
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+    
     def log_message(self, format, *args):
         """Suppress default logging"""
         pass
@@ -480,36 +239,68 @@ class LocalseekHandler(BaseHTTPRequestHandler):
     
     def _serve_html(self):
         """Serve the main HTML page"""
-        self.send_response(200)
-        self.send_header("Content-Type", "text/html; charset=utf-8")
-        self.end_headers()
-        self.wfile.write(HTML_TEMPLATE.encode("utf-8"))
+        if self.headers.get("If-None-Match") == _HTML_ETAG:
+            self._write_response(304, [("ETag", _HTML_ETAG)])
+            return
+        
+        use_gzip = self._accepts_gzip()
+        headers = [("Content-Type", "text/html; charset=utf-8")]
+        if use_gzip:
+            headers.append(("Content-Encoding", "gzip"))
+        headers += [
+            ("Content-Length", _HTML_GZIP_LENGTH if use_gzip else _HTML_LENGTH),
+            ("Vary", "Accept-Encoding"),
+            ("Cache-Control", "public, max-age=3600"),
+            ("ETag", _HTML_ETAG),
+        ]
+        self._write_response(200, headers, _HTML_GZIP if use_gzip else _HTML_BYTES)
+    
+    def _accepts_gzip(self) -> bool:
+        """Whether the client sent Accept-Encoding with gzip"""
+        return "gzip" in self.headers.get("Accept-Encoding", "")
     
     def _handle_search(self, query_string: str):
         """Handle search API request"""
-        params = urllib.parse.parse_qs(query_string)
+        params = _parse_params(query_string)
         
-        query = params.get("q", [""])[0]
+        query = params.get("q", "")
         if not query:
             self._send_json({"error": "Missing query parameter"}, 400)
             return
         
-        use_expand = params.get("expand", ["false"])[0].lower() == "true"
-        use_rerank = params.get("rerank", ["false"])[0].lower() == "true"
-        use_fetch = params.get("fetch", ["false"])[0].lower() == "true"
-        use_summarize = params.get("summarize", ["false"])[0].lower() == "true"
-        limit = int(params.get("limit", ["10"])[0])
+        use_expand = params.get("expand") in _TRUE_VALUES
+        use_rerank = params.get("rerank") in _TRUE_VALUES
+        use_fetch = params.get("fetch") in _TRUE_VALUES
+        use_summarize = params.get("summarize") in _TRUE_VALUES
+        limit = int(params.get("limit", "10"))
+        search_args = dict(
+            query=query,
+            limit=limit,
+            use_expand=use_expand,
+            use_rerank=use_rerank,
+            use_fetch=use_fetch,
+            use_summarize=use_summarize,
+        )
+        
+        # Chunked encoding needs an HTTP/1.1 client
+        stream = params.get("stream") in _TRUE_VALUES
+        if stream and self.request_version == "HTTP/1.1":
+            cache_key = ("search-stream", query, limit, use_expand, use_rerank, use_fetch, use_summarize)
+            self._stream_search(cache_key, search_args)
+            return
+        
+        cache = _get_response_cache()
+        cache_key = ("search", query, limit, use_expand, use_rerank, use_fetch, use_summarize)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            self._send_body(cached[0])
+            return
         
         try:
-            result = self._do_search(
-                query, 
-                limit=limit,
-                use_expand=use_expand,
-                use_rerank=use_rerank,
-                use_fetch=use_fetch,
-                use_summarize=use_summarize,
-            )
-            self._send_json(result)
+            result = self._do_search(**search_args)
+            body = _encode_json(result)
+            cache.set(cache_key, [body])
+            self._send_body(body)
         except Exception as e:
             self._send_json({"error": str(e)}, 500)
     
@@ -523,91 +314,90 @@ class LocalseekHandler(BaseHTTPRequestHandler):
         use_summarize: bool = False,
     ) -> dict:
         """Perform search and return results dict"""
-        searcher = Searcher()
+        response = {
+            "query": query,
+            "expanded_queries": None,
+            "count": 0,
+            "summary": None,
+            "results": [],
+            "web_results": None,
+        }
+        for kind, data in self._search_stages(
+            query, limit, use_expand, use_rerank, use_fetch, use_summarize
+        ):
+            if kind == "local":
+                response.update(data)
+            elif kind == "web":
+                response["web_results"] = data
+            else:
+                response["summary"] = data
+        return response
+    
+    def _search_stages(
+        self,
+        query: str,
+        limit: int,
+        use_expand: bool,
+        use_rerank: bool,
+        use_fetch: bool,
+        use_summarize: bool,
+    ) -> Iterator[Tuple[str, object]]:
+        """
+        Perform search, yielding each part of the response once it is ready
         
-        try:
+        Yields ("local", {...}) with the (expanded, reranked) local results
+        first, then ("web", [...]) and ("summary", str) if requested. The
+        web fetch and the LLM summary are the slow parts, so a streamed
+        response can show local results without waiting for them.
+        """
+        _resolve_optionals()
+        
+        # Web search only needs the original query; let it run while
+        # the local search, rerank and LLM steps do
+        web_future = None
+        if use_fetch and _fetch_web_results_async is not None:
+            web_future = _fetch_web_results_async(query, max_results=3)
+        
+        with _borrow_searcher() as searcher:
             queries = [query]
             
-            # Expand query if requested
-            if use_expand:
-                try:
-                    from ..optional.expand import expand_query, ExpansionCache
-                    cache = ExpansionCache()
-                    queries, _ = expand_query(query, count=2, cache=cache)
-                except ImportError:
-                    pass
+            # Expand query if requested (in the background, while the
+            # original query is searched)
+            expand_future = None
+            if use_expand and _expand_query_async is not None:
+                expansion_cache = _ExpansionCache()
+                expand_future = _expand_query_async(query, count=2, cache=expansion_cache)
             
-            # Search with all queries
-            all_results = []
-            for q in queries:
-                results = searcher.search(q, limit=limit * 2 if use_rerank else limit)
-                all_results.extend(results)
-            
-            # Dedupe
-            seen = set()
-            unique_results = []
-            for r in all_results:
-                key = f"{r.collection}:{r.path}"
-                if key not in seen:
-                    seen.add(key)
-                    unique_results.append(r)
-            results = unique_results[:limit * 2 if use_rerank else limit]
-            
-            # Rerank if requested
-            if use_rerank and results:
-                try:
-                    from ..optional.rerank import rerank_results, RerankCache
-                    cache = RerankCache()
-                    result_dicts = [r.to_dict() for r in results]
-                    reranked, _ = rerank_results(query, result_dicts, topk=20, cache=cache)
-                    if reranked:
-                        results = reranked[:limit]
-                except ImportError:
-                    results = results[:limit]
-            else:
-                results = results[:limit]
-            
-            # Fetch web results if requested
-            web_results = []
-            if use_fetch:
+            # Search with all queries (the expansions concurrently)
+            search_limit = limit * 2 if use_rerank else limit
+            all_results = searcher.search(query, limit=search_limit)
+            if expand_future is not None:
                 try:
-                    from ..optional.web_search import fetch_web_results
-                    web_results = fetch_web_results(query, max_results=3)
-                except ImportError:
+                    queries, _ = expand_future.result(timeout=get_config().expand_timeout)
+                    expansion_cache.close()
+                except FutureTimeoutError:
                     pass
-            
-            # Summarize if requested
-            summary = None
-            if use_summarize:
-                try:
-                    from ..optional.summarize import summarize_with_context
-                    result_dicts = []
-                    for r in results:
-                        if hasattr(r, 'to_dict'):
-                            result_dicts.append(r.to_dict())
-                        elif hasattr(r, 'blended_score'):
-                            result_dicts.append({
-                                "title": r.title,
-                                "snippet": r.snippet,
-                                "score": r.blended_score,
-                            })
-                        else:
-                            result_dicts.append(r)
-                    
-                    summary = summarize_with_context(
-                        query,
-                        result_dicts,
-                        expanded_queries=queries if len(queries) > 1 else None,
-                        web_results=web_results if web_results else None,
-                    )
-                except ImportError:
-                    pass
-            
-            # Format results for JSON
-            formatted_results = []
-            for r in results:
-                if hasattr(r, 'blended_score'):
-                    formatted_results.append({
+                for extra in searcher.search_many(queries[1:], limit=search_limit):
+                    all_results.extend(extra)
+        
+        # Dedupe, keeping first-seen order
+        unique_results = {}
+        for r in all_results:
+            unique_results.setdefault((r.collection, r.path), r)
+        results = list(unique_results.values())[:search_limit]
+        
+        # Result dicts are built once; rerank, summarize and the
+        # response all read them
+        result_dicts = [r.to_dict() for r in results]
+        
+        # Rerank if requested
+        if use_rerank and result_dicts and _rerank_results is not None:
+            cache = _RerankCache()
+            reranked, _ = _rerank_results(query, result_dicts, topk=20, cache=cache)
+            cache.close()
+            if reranked:
+                result_dicts = [
+                    {
                         "path": r.path,
                         "title": r.title,
                         "snippet": r.snippet,
@@ -615,46 +405,115 @@ class LocalseekHandler(BaseHTTPRequestHandler):
                         "blended_score": r.blended_score,
                         "collection": r.collection,
                         "full_path": r.full_path,
-                    })
-                else:
-                    formatted_results.append(r.to_dict())
-            
-            return {
-                "query": query,
-                "expanded_queries": queries if len(queries) > 1 else None,
-                "count": len(results),
-                "summary": summary,
-                "results": formatted_results,
-                "web_results": web_results if web_results else None,
-            }
+                    }
+                    for r in reranked[:limit]
+                ]
+        result_dicts = result_dicts[:limit]
+        
+        expanded_queries = queries if len(queries) > 1 else None
+        yield "local", {
+            "query": query,
+            "expanded_queries": expanded_queries,
+            "count": len(result_dicts),
+            "results": result_dicts,
+        }
+        
+        # Collect web results if requested
+        web_results = web_future.result() if web_future is not None else []
+        if use_fetch:
+            yield "web", web_results if web_results else None
+        
+        # Summarize if requested
+        if use_summarize and _summarize_with_context is not None:
+            summary_input = result_dicts
+            if result_dicts and "blended_score" in result_dicts[0]:
+                # Reranked results are summarized by blended score
+                summary_input = [
+                    {"title": d["title"], "snippet": d["snippet"], "score": d["blended_score"]}
+                    for d in result_dicts
+                ]
             
-        finally:
-            searcher.close()
+            yield "summary", _summarize_with_context(
+                query,
+                summary_input,
+                expanded_queries=expanded_queries,
+                web_results=web_results if web_results else None,
+            )
+    
+    def _stream_search(self, cache_key: tuple, search_args: dict):
+        """
+        Send search results as newline-delimited JSON, one chunk per part
+        
+        Each line is {"type": "local" | "web" | "summary" | "error",
+        "data": ...}, written with chunked transfer encoding as soon as
+        _search_stages() yields it.
+        """
+        self._write_response(200, [
+            ("Content-Type", "application/x-ndjson"),
+            ("Access-Control-Allow-Origin", "*"),
+            ("Cache-Control", "no-cache"),
+            ("Transfer-Encoding", "chunked"),
+        ])
+        
+        cache = _get_response_cache()
+        lines = cache.get(cache_key)
+        if lines is not None:
+            for line in lines:
+                self._write_chunk(line)
+        else:
+            lines = []
+            stages = self._search_stages(**search_args)
+            while True:
+                # Only search errors become an error message; a failed
+                # write (client gone) propagates
+                try:
+                    kind, data = next(stages)
+                except StopIteration:
+                    cache.set(cache_key, lines)
+                    break
+                except Exception as e:
+                    self._write_chunk(_encode_json({"type": "error", "data": str(e)}) + b"\n")
+                    break
+                
+                line = _encode_json({"type": kind, "data": data}) + b"\n"
+                lines.append(line)
+                self._write_chunk(line)
+        
+        self.wfile.write(b"0\r\n\r\n")
+    
+    def _write_chunk(self, data: bytes):
+        """Write one chunk of a Transfer-Encoding: chunked response"""
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
     
     def _handle_status(self):
         """Handle status API request"""
-        indexer = Indexer()
-        try:
-            collections = indexer.list_collections()
-            total_docs = sum(c.get("doc_count", 0) for c in collections)
-            self._send_json({
-                "status": "ok",
-                "collections": len(collections),
-                "documents": total_docs,
-            })
-        finally:
-            indexer.close()
+        with _indexer_lock:
+            collections = _get_indexer().list_collections()
+        total_docs = sum(c.get("doc_count", 0) for c in collections)
+        self._send_json({
+            "status": "ok",
+            "collections": len(collections),
+            "documents": total_docs,
+        })
     
     def _handle_open(self, query_string: str):
         """Handle open file API request"""
-        params = urllib.parse.parse_qs(query_string)
-        file_path = params.get("path", [""])[0]
+        file_path = _parse_params(query_string).get("path", "")
         
         if not file_path:
             self._send_json({"success": False, "error": "Missing path parameter"}, 400)
             return
         
-        # Verify file exists
+        # Only open files from the index, never an arbitrary path
+        if file_path not in _openable_paths:
+            with _borrow_searcher() as searcher:
+                indexed = searcher.is_indexed(file_path)
+            if not indexed:
+                self._send_json({"success": False, "error": "Not an indexed file"}, 403)
+                return
+            _openable_paths.add(file_path)
+        
+        # Verify file exists (it may have been deleted since indexing)
         path = Path(file_path)
         if not path.exists():
             self._send_json({"success": False, "error": "File not found"}, 404)
@@ -662,16 +521,20 @@ class LocalseekHandler(BaseHTTPRequestHandler):
         
         try:
             # Use VS Code for text-based files
-            text_extensions = {'.md', '.txt', '.rst', '.json', '.yaml', '.yml', '.py', '.js', '.ts', '.html', '.css'}
-            use_vscode = path.suffix.lower() in text_extensions
+            use_vscode = _VSCODE is not None and path.suffix.lower() in TEXT_EXTENSIONS
             
             if use_vscode:
-                # Try VS Code first
+                # Try VS Code first. The launcher only hands the file to
+                # the running editor, but takes a few hundred ms to start:
+                # don't hold the request (or the next click) until it exits
                 try:
-                    subprocess.run(["code", file_path], check=True, shell=(sys.platform == "win32"))
+                    subprocess.Popen(
+                        [_VSCODE, "--reuse-window", file_path],
+                        shell=(sys.platform == "win32"),
+                    )
                     self._send_json({"success": True, "path": file_path, "editor": "vscode"})
                     return
-                except (subprocess.CalledProcessError, FileNotFoundError):
+                except OSError:
                     pass  # Fall back to default
             
             # Open with default application
@@ -688,43 +551,133 @@ class LocalseekHandler(BaseHTTPRequestHandler):
     
     def _handle_autocomplete(self, query_string: str):
         """Handle autocomplete API request"""
-        params = urllib.parse.parse_qs(query_string)
-        prefix = params.get("prefix", [""])[0]
-        limit = int(params.get("limit", ["8"])[0])
+        params = _parse_params(query_string)
+        prefix = params.get("prefix", "")
+        limit = int(params.get("limit", "8"))
         
         if not prefix or len(prefix) < 2:
             self._send_json({"suggestions": []})
             return
         
+        headers = {"Cache-Control": f"max-age={AUTOCOMPLETE_MAX_AGE}"}
+        cache = _get_response_cache()
+        cache_key = ("autocomplete", prefix, limit)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            self._send_body(cached[0], headers=headers)
+            return
+        
         try:
-            searcher = Searcher()
-            try:
-                suggestions = searcher.autocomplete(prefix, limit=limit)
-                self._send_json({"suggestions": suggestions})
-            finally:
-                searcher.close()
+            body = _encode_json({"suggestions": _autocomplete(prefix, limit)})
+            cache.set(cache_key, [body])
+            self._send_body(body, headers=headers)
         except Exception as e:
             self._send_json({"error": str(e)}, 500)
     
     def _send_json(self, data: dict, status: int = 200):
         """Send JSON response"""
-        self.send_response(status)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.end_headers()
-        self.wfile.write(json.dumps(data, default=str).encode("utf-8"))
+        self._send_body(_encode_json(data), status)
+    
+    def _send_body(self, body: bytes, status: int = 200, headers: Optional[dict] = None):
+        """Send an already encoded JSON response"""
+        use_gzip = len(body) >= GZIP_MIN_BYTES and self._accepts_gzip()
+        if use_gzip:
+            body = gzip.compress(body, compresslevel=6)
+        
+        response_headers = [
+            ("Content-Type", "application/json"),
+            ("Access-Control-Allow-Origin", "*"),
+        ]
+        if use_gzip:
+            response_headers.append(("Content-Encoding", "gzip"))
+        response_headers.append(("Content-Length", str(len(body))))
+        response_headers.append(("Vary", "Accept-Encoding"))
+        if headers:
+            response_headers += headers.items()
+        self._write_response(status, response_headers, body)
     
     def _send_404(self):
         """Send 404 response"""
-        self.send_response(404)
-        self.send_header("Content-Type", "text/plain")
-        self.end_headers()
-        self.wfile.write(b"Not Found")
+        self._write_response(
+            404,
+            [("Content-Type", "text/plain"), ("Content-Length", "9")],
+            b"Not Found",
+        )
+    
+    def _write_response(self, status: int, headers: List[Tuple[str, str]], body: bytes = b""):
+        """
+        Write status line, headers and body with a single socket write
+        
+        send_response()/end_headers() flush the headers in one write and
+        the body then goes out in another; small JSON responses fit in a
+        single segment when sent together.
+        """
+        self.log_request(status)
+        reason = self.responses.get(status, ("",))[0]
+        lines = [
+            f"{self.protocol_version} {status} {reason}",
+            f"Server: {self.version_string()}",
+            f"Date: {self.date_time_string()}",
+        ]
+        lines += [f"{name}: {value}" for name, value in headers]
+        lines.append("\r\n")
+        self.wfile.write("\r\n".join(lines).encode("latin-1", "strict") + body)
+
+
+# Query string values that turn a flag (expand, rerank, ...) on
+_TRUE_VALUES = frozenset({"true", "True", "TRUE", "1", "on", "yes"})
+
+
+def _parse_params(query_string: str) -> dict:
+    """Parse a query string into {key: first value} (blank values dropped)"""
+    params = {}
+    for key, value in urllib.parse.parse_qsl(query_string):
+        params.setdefault(key, value)
+    return params
+
+
+def _encode_json(data: dict) -> bytes:
+    """Encode a JSON response body (orjson when installed)"""
+    return jsonio.dumpb(data)
+
+
+# Most connections served at once; further ones wait to be accepted
+MAX_REQUEST_THREADS = 32
+
+
+class LocalseekServer(ThreadingHTTPServer):
+    """
+    ThreadingHTTPServer with a cap on concurrent connection threads
+    
+    A burst of requests (an autocomplete storm, many tabs) queues in the
+    listen backlog instead of starting an unbounded number of threads.
+    """
+    
+    def __init__(self, server_address, handler_class, max_threads: int = MAX_REQUEST_THREADS):
+        super().__init__(server_address, handler_class)
+        self._slots = threading.BoundedSemaphore(max_threads)
+    
+    def process_request(self, request, client_address):
+        self._slots.acquire()
+        try:
+            super().process_request(request, client_address)
+        except BaseException:
+            self._slots.release()
+            raise
+    
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._slots.release()
 
 
 def run_server(port: int = 8080, host: str = "127.0.0.1"):
     """Run the web server"""
-    server = HTTPServer((host, port), LocalseekHandler)
+    # One thread per connection, so a slow search (LLM rerank, web fetch)
+    # doesn't hold up autocomplete or other tabs
+    server = LocalseekServer((host, port), LocalseekHandler)
+    _resolve_optionals()
     print(f"localseek web UI running at http://{host}:{port}")
     print("Press Ctrl+C to stop")
     